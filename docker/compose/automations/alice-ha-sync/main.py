@@ -19,15 +19,20 @@ import queue
 import re
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from typing import NamedTuple
 from urllib.parse import urlparse
 
 import paho.mqtt.client as mqtt
 import psycopg2
+import psycopg2.extensions
 import psycopg2.extras
+import psycopg2.pool
 import requests
 import weaviate
 from weaviate.classes.query import Filter
+from weaviate.util import generate_uuid5
 
 # ---------------------------------------------------------------------------
 # Logging
@@ -49,6 +54,14 @@ MQTT_PASSWORD = os.environ.get("MQTT_PASSWORD", "")
 POSTGRES_CONNECTION = os.environ.get("POSTGRES_CONNECTION", "")
 WEAVIATE_URL = os.environ.get("WEAVIATE_URL", "")
 CERTAINTY_THRESHOLD = float(os.environ.get("CERTAINTY_THRESHOLD", "0.82"))
+# "reconcile" = insert/update/delete only the HAIntent objects that differ
+# (deterministic UUIDs), "replace" = delete all objects of the affected
+# entities and insert them again (re-embeds everything)
+WEAVIATE_SYNC_MODE = os.environ.get("WEAVIATE_SYNC_MODE", "reconcile").lower()
+# Entity IDs per delete_many(ContainsAny) request, and how many of those
+# requests run in parallel
+WEAVIATE_DELETE_CHUNK_SIZE = max(1, int(os.environ.get("WEAVIATE_DELETE_CHUNK_SIZE", "100")))
+WEAVIATE_DELETE_CONCURRENCY = max(1, int(os.environ.get("WEAVIATE_DELETE_CONCURRENCY", "4")))
 
 MQTT_SUBSCRIBE_TOPIC = "alice/ha/sync"
 MQTT_INFO_TOPIC = "alice/system/ha-sync/info"
@@ -56,8 +69,47 @@ MQTT_WARNING_TOPIC = "alice/system/ha-sync/warning"
 MQTT_ERROR_TOPIC = "alice/system/ha-sync/error"
 
 WEAVIATE_BATCH_SIZE = 100
+# Seconds between readiness checks of the shared Weaviate client
+WEAVIATE_HEALTH_CHECK_INTERVAL = 30
+HAINTENT_PROPERTIES = [
+    "utterance", "entityId", "domain", "service", "parameters",
+    "language", "intentTemplate", "certaintyThreshold",
+]
+# Reconcile: above this many entities the whole collection is scanned once
+# instead of querying the objects entity by entity
+RECONCILE_SCAN_THRESHOLD = 200
+RECONCILE_PAGE_SIZE = 1000
+RECONCILE_DELETE_CHUNK = 500  # object ids per delete_many
+# Weaviate's QUERY_MAXIMUM_RESULTS (default 10000): offset+limit of a query
+# must stay below it, and one delete_many matches at most this many objects
+# (a chunk that hit the cap is deleted again until it matches fewer)
+WEAVIATE_QUERY_MAXIMUM_RESULTS = 10000
 HEARTBEAT_FILE = "/tmp/heartbeat"
+# PostgreSQL connection pool size (connections are opened on demand up to max)
+DB_POOL_MIN = int(os.environ.get("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", "4"))
+# Seconds get_db_connection() waits for a free pooled connection
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+# Pool metrics, rewritten together with the heartbeat
+DB_POOL_STATS_FILE = "/tmp/db-pool-stats.json"
 HEARTBEAT_INTERVAL = 30  # seconds
+# Seconds to keep collecting MQTT events after the first one before they are
+# merged and processed together (0 = only merge what is already queued)
+COALESCE_WINDOW = float(os.environ.get("COALESCE_WINDOW", "2"))
+COALESCE_MAX_EVENTS = 1000
+FULL_SYNC_EVENTS = ("ha_start", "templates_updated", "area_registry_updated", "websocket_reconnected")
+# Seconds the HA area registry is cached in-process (invalidated by
+# area_registry_updated events, refreshed on every full sync)
+AREA_CACHE_TTL = float(os.environ.get("AREA_CACHE_TTL", "300"))
+# Optional: keep a HA WebSocket connection and turn entity/area registry
+# updates into sync events directly (needs websocket-client)
+HA_WEBSOCKET_ENABLED = os.environ.get("HA_WEBSOCKET_ENABLED", "false").lower() in ("1", "true", "yes")
+# Defaults to HA_URL with ws(s):// and /api/websocket
+HA_WEBSOCKET_URL = os.environ.get("HA_WEBSOCKET_URL", "")
+HA_WEBSOCKET_PING_INTERVAL = 30  # seconds without messages before a ping is sent
+# Entity registry changes that can alter utterances (others are ignored)
+_RELEVANT_ENTITY_CHANGES = {"name", "original_name", "area_id", "aliases", "device_id", "entity_id"}
+_ENTITY_ID_RE = re.compile(r"^[a-zA-Z_]+\.[a-zA-Z0-9_\-]+$")
 
 # ---------------------------------------------------------------------------
 # Validate required config
@@ -158,9 +210,117 @@ class MQTTClient:
 # ---------------------------------------------------------------------------
 # Database helpers
 # ---------------------------------------------------------------------------
+_db_pool = None
+_db_pool_lock = threading.Lock()
+# One slot per pooled connection: borrowers wait here instead of getting a
+# PoolError from getconn() while the heartbeat and a sync share the pool
+_db_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+_db_pool_stats = {
+    "acquired": 0,     # connections handed out since start
+    "discarded": 0,    # broken connections closed instead of reused
+    "waited": 0,       # borrows that had to wait for a free connection
+    "exhausted": 0,    # borrows that gave up after DB_POOL_TIMEOUT
+    "in_use": 0,
+    "peak_in_use": 0,
+}
+
+
+def _get_db_pool() -> psycopg2.pool.ThreadedConnectionPool:
+    global _db_pool
+    with _db_pool_lock:
+        if _db_pool is None:
+            _db_pool = psycopg2.pool.ThreadedConnectionPool(
+                DB_POOL_MIN, DB_POOL_MAX, POSTGRES_CONNECTION
+            )
+            logger.info("PostgreSQL pool created (min=%d, max=%d)", DB_POOL_MIN, DB_POOL_MAX)
+        return _db_pool
+
+
+def _db_connection_alive(conn) -> bool:
+    """Ping a pooled connection; the server may have dropped it (restart, idle timeout)."""
+    if conn.closed:
+        return False
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
 def get_db_connection():
-    """Create a new PostgreSQL connection."""
-    return psycopg2.connect(POSTGRES_CONNECTION)
+    """
+    Borrow a PostgreSQL connection from the pool. Return it with release_db_connection().
+    Waits up to DB_POOL_TIMEOUT seconds while all connections are in use, then
+    raises PoolError. Dead connections are discarded and replaced by a fresh one.
+    """
+    pool = _get_db_pool()
+    if not _db_pool_slots.acquire(blocking=False):
+        with _db_pool_lock:
+            _db_pool_stats["waited"] += 1
+        if not _db_pool_slots.acquire(timeout=DB_POOL_TIMEOUT):
+            with _db_pool_lock:
+                _db_pool_stats["exhausted"] += 1
+            logger.error(
+                "PostgreSQL pool exhausted: all %d connections in use for %gs", DB_POOL_MAX, DB_POOL_TIMEOUT
+            )
+            raise psycopg2.pool.PoolError("connection pool exhausted")
+    try:
+        conn = pool.getconn()
+        if not _db_connection_alive(conn):
+            logger.warning("Discarding dead PostgreSQL connection from pool")
+            pool.putconn(conn, close=True)
+            with _db_pool_lock:
+                _db_pool_stats["discarded"] += 1
+            conn = pool.getconn()
+    except BaseException:
+        _db_pool_slots.release()
+        raise
+    with _db_pool_lock:
+        _db_pool_stats["acquired"] += 1
+        _db_pool_stats["in_use"] += 1
+        _db_pool_stats["peak_in_use"] = max(_db_pool_stats["peak_in_use"], _db_pool_stats["in_use"])
+    return conn
+
+
+def release_db_connection(conn):
+    """
+    Hand a connection back to the pool. An open transaction is rolled back;
+    a connection that is closed or fails the rollback is discarded.
+    """
+    if conn is None:
+        return
+    broken = bool(conn.closed)
+    if not broken:
+        try:
+            if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except psycopg2.Error:
+            broken = True
+    try:
+        _get_db_pool().putconn(conn, close=broken)
+    except Exception as e:
+        logger.warning("Failed to return connection to pool: %s", e)
+    _db_pool_slots.release()
+    with _db_pool_lock:
+        _db_pool_stats["in_use"] -= 1
+        if broken:
+            _db_pool_stats["discarded"] += 1
+
+
+def db_pool_stats() -> dict:
+    """Snapshot of the pool metrics."""
+    with _db_pool_lock:
+        return {"min": DB_POOL_MIN, "max": DB_POOL_MAX, **_db_pool_stats}
+
+
+def close_db_pool():
+    global _db_pool
+    with _db_pool_lock:
+        if _db_pool is not None:
+            _db_pool.closeall()
+            _db_pool = None
 
 
 def crash_recovery():
@@ -187,8 +347,7 @@ def crash_recovery():
     except Exception as e:
         logger.error("Crash recovery failed: %s", e)
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
 
 
 def check_concurrent_sync() -> bool:
@@ -211,8 +370,7 @@ def check_concurrent_sync() -> bool:
         logger.error("Concurrent sync check failed: %s", e)
         return False
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
 
 
 def create_sync_log(sync_type: str, trigger_source: str) -> int | None:
@@ -236,8 +394,7 @@ def create_sync_log(sync_type: str, trigger_source: str) -> int | None:
         logger.error("Failed to create sync log: %s", e)
         return None
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
 
 
 def update_sync_log(
@@ -290,110 +447,193 @@ def update_sync_log(
     except Exception as e:
         logger.error("Failed to update sync log %d: %s", log_id, e)
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
 
 
-def load_templates(domain: str | None = None) -> list[dict]:
-    """Load active intent templates from PostgreSQL. If domain is None, load all."""
+_TEMPLATE_COLUMNS = "domain, intent, service, patterns, pattern_slots, default_parameters, language"
+# Before sql/migrations/014-ha-intent-pattern-slots.sql: slots are scanned at runtime
+_TEMPLATE_COLUMNS_PRE_014 = "domain, intent, service, patterns, NULL AS pattern_slots, default_parameters, language"
+
+
+def _query_templates(conn, columns: str, domain: str | None) -> list[dict]:
+    with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        if domain:
+            cur.execute(
+                f"""
+                SELECT {columns}
+                FROM alice.ha_intent_templates
+                WHERE is_active = true AND domain = %s
+                ORDER BY priority DESC
+                """,
+                (domain,),
+            )
+        else:
+            cur.execute(
+                f"""
+                SELECT {columns}
+                FROM alice.ha_intent_templates
+                WHERE is_active = true
+                ORDER BY domain, priority DESC
+                """
+            )
+        return [dict(r) for r in cur.fetchall()]
+
+
+def load_templates(domain: str | None = None) -> list[dict] | None:
+    """
+    Load active intent templates from PostgreSQL. If domain is None, load all.
+    Returns None if the templates could not be loaded, so callers can abort
+    instead of treating every domain as template-less.
+    """
+    conn = None
+    try:
+        conn = get_db_connection()
+        try:
+            return _query_templates(conn, _TEMPLATE_COLUMNS, domain)
+        except psycopg2.ProgrammingError as e:
+            if e.pgcode != "42703":  # undefined_column
+                raise
+            conn.rollback()
+            logger.warning(
+                "alice.ha_intent_templates has no pattern_slots column -- run "
+                "sql/migrations/014-ha-intent-pattern-slots.sql; scanning patterns at runtime"
+            )
+            return _query_templates(conn, _TEMPLATE_COLUMNS_PRE_014, domain)
+    except Exception as e:
+        logger.error("Failed to load templates: %s", e)
+        return None
+    finally:
+        release_db_connection(conn)
+
+
+def load_existing_entities(entity_ids: list[str] | None = None) -> dict[str, dict]:
+    """
+    Load active entities from PostgreSQL as a dict keyed by entity_id.
+    If entity_ids is given, only those rows are loaded.
+    """
     conn = None
     try:
         conn = get_db_connection()
         with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-            if domain:
+            if entity_ids is not None:
                 cur.execute(
                     """
-                    SELECT domain, intent, service, patterns, default_parameters, language
-                    FROM alice.ha_intent_templates
-                    WHERE is_active = true AND domain = %s
-                    ORDER BY priority DESC
+                    SELECT entity_id, friendly_name, area_id, area_name, aliases, domain
+                    FROM alice.ha_entities
+                    WHERE is_active = true AND entity_id = ANY(%s)
                     """,
-                    (domain,),
+                    (list(entity_ids),),
                 )
             else:
                 cur.execute(
                     """
-                    SELECT domain, intent, service, patterns, default_parameters, language
-                    FROM alice.ha_intent_templates
+                    SELECT entity_id, friendly_name, area_id, area_name, aliases, domain
+                    FROM alice.ha_entities
                     WHERE is_active = true
-                    ORDER BY domain, priority DESC
                     """
                 )
             rows = cur.fetchall()
-        return [dict(r) for r in rows]
+        return {r["entity_id"]: dict(r) for r in rows}
     except Exception as e:
-        logger.error("Failed to load templates: %s", e)
-        return []
+        logger.error("Failed to load existing entities: %s", e)
+        return {}
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
 
 
-def load_existing_entities() -> dict[str, dict]:
-    """Load all active entities from PostgreSQL as a dict keyed by entity_id."""
+def load_entity_ids_in_areas(area_ids: list[str]) -> list[str]:
+    """Return the active entity_ids assigned to any of the given areas."""
     conn = None
     try:
         conn = get_db_connection()
-        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        with conn.cursor() as cur:
             cur.execute(
                 """
-                SELECT entity_id, friendly_name, area_id, area_name, aliases, domain
-                FROM alice.ha_entities
-                WHERE is_active = true
-                """
+                SELECT entity_id FROM alice.ha_entities
+                WHERE is_active = true AND area_id = ANY(%s)
+                ORDER BY entity_id
+                """,
+                (list(area_ids),),
             )
-            rows = cur.fetchall()
-        return {r["entity_id"]: dict(r) for r in rows}
+            return [r[0] for r in cur.fetchall()]
     except Exception as e:
-        logger.error("Failed to load existing entities: %s", e)
-        return {}
+        logger.error("Failed to load entities of areas %s: %s", area_ids, e)
+        return []
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
 
 
 def upsert_entities(entities: list[dict]):
-    """Upsert entities into alice.ha_entities."""
+    """
+    Upsert entities into alice.ha_entities with a single execute_values
+    statement. Rows whose stored values are identical are not rewritten
+    (updated_at unchanged); only their last_seen_at is bumped, so it keeps
+    meaning "last seen by a sync".
+    """
     if not entities:
         return
+    # ON CONFLICT cannot touch the same row twice in one statement -> last one wins
+    rows = {
+        e["entity_id"]: (
+            e["entity_id"],
+            e["domain"],
+            e.get("friendly_name") or _fallback_name(e["entity_id"]),
+            e.get("area_id"),
+            e.get("area_name"),
+            json.dumps(e.get("aliases", [])),
+        )
+        for e in entities
+    }
     conn = None
     try:
         conn = get_db_connection()
         with conn.cursor() as cur:
-            for e in entities:
-                friendly_name = e.get("friendly_name") or _fallback_name(e["entity_id"])
+            written = psycopg2.extras.execute_values(
+                cur,
+                """
+                INSERT INTO alice.ha_entities AS t
+                    (entity_id, domain, friendly_name, area_id, area_name,
+                     aliases, is_active, weaviate_synced, last_seen_at, updated_at)
+                VALUES %s
+                ON CONFLICT (entity_id) DO UPDATE SET
+                    domain = EXCLUDED.domain,
+                    friendly_name = EXCLUDED.friendly_name,
+                    area_id = EXCLUDED.area_id,
+                    area_name = EXCLUDED.area_name,
+                    aliases = EXCLUDED.aliases,
+                    is_active = true,
+                    weaviate_synced = true,
+                    last_seen_at = NOW(),
+                    updated_at = NOW()
+                WHERE (t.domain, t.friendly_name, t.area_id, t.area_name,
+                       t.aliases, t.is_active, t.weaviate_synced)
+                      IS DISTINCT FROM
+                      (EXCLUDED.domain, EXCLUDED.friendly_name, EXCLUDED.area_id,
+                       EXCLUDED.area_name, EXCLUDED.aliases, true, true)
+                RETURNING t.entity_id
+                """,
+                list(rows.values()),
+                template="(%s, %s, %s, %s, %s, %s::jsonb, true, true, NOW(), NOW())",
+                page_size=1000,
+                fetch=True,
+            )
+            unchanged = list(rows.keys() - {r[0] for r in written})
+            if unchanged:
                 cur.execute(
                     """
-                    INSERT INTO alice.ha_entities
-                        (entity_id, domain, friendly_name, area_id, area_name,
-                         aliases, is_active, weaviate_synced, last_seen_at, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, true, true, NOW(), NOW())
-                    ON CONFLICT (entity_id) DO UPDATE SET
-                        domain = EXCLUDED.domain,
-                        friendly_name = EXCLUDED.friendly_name,
-                        area_id = EXCLUDED.area_id,
-                        area_name = EXCLUDED.area_name,
-                        aliases = EXCLUDED.aliases,
-                        is_active = true,
-                        weaviate_synced = true,
-                        last_seen_at = NOW(),
-                        updated_at = NOW()
+                    UPDATE alice.ha_entities SET last_seen_at = NOW()
+                    WHERE entity_id = ANY(%s)
                     """,
-                    (
-                        e["entity_id"],
-                        e["domain"],
-                        friendly_name,
-                        e.get("area_id"),
-                        e.get("area_name"),
-                        json.dumps(e.get("aliases", [])),
-                    ),
+                    (unchanged,),
                 )
             conn.commit()
+        logger.info(
+            "Upserted entities: %d written, %d unchanged", len(written), len(rows) - len(written)
+        )
     except Exception as e:
         logger.error("Failed to upsert entities: %s", e)
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
 
 
 def deactivate_entities(entity_ids: list[str]):
@@ -416,8 +656,7 @@ def deactivate_entities(entity_ids: list[str]):
     except Exception as e:
         logger.error("Failed to deactivate entities: %s", e)
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
 
 
 # ---------------------------------------------------------------------------
@@ -435,47 +674,73 @@ class HAFetchError:
         self.detail = detail
 
 
+class _StateRecord(NamedTuple):
+    """The fields of one /api/states entry that the sync needs."""
+
+    entity_id: str
+    friendly_name: str | None
+    area_id: str | None
+    device_class: str | None
+
+
+def _state_record(s: dict) -> _StateRecord:
+    attrs = s.get("attributes") or {}
+    return _StateRecord(
+        s.get("entity_id", ""),
+        attrs.get("friendly_name"),
+        attrs.get("area_id"),
+        attrs.get("device_class"),
+    )
+
+
+def _parse_states(resp) -> list[_StateRecord]:
+    """
+    Project a /api/states response onto _StateRecord. With ijson installed the
+    body is parsed incrementally from the socket, so only one state (with its
+    attributes) is materialised at a time; otherwise falls back to resp.json().
+    """
+    try:
+        import ijson
+    except ImportError:
+        return [_state_record(s) for s in resp.json()]
+
+    resp.raw.decode_content = True  # let urllib3 undo gzip/deflate
+    return [_state_record(s) for s in ijson.items(resp.raw, "item")]
+
+
 def fetch_ha_entities() -> list[dict] | HAFetchError:
     """Fetch entities from HA /api/states (REST, all HA versions). Area info fetched
     optionally from area registry and gracefully omitted if unavailable."""
     try:
-        states_resp = requests.get(
+        with requests.get(
             f"{HA_URL}/api/states",
             headers=_ha_headers(),
             timeout=30,
-        )
-        if states_resp.status_code == 401:
-            return HAFetchError(
-                "invalid_token",
-                "HA API returned 401 Unauthorized -- check HA_TOKEN",
-            )
-        states_resp.raise_for_status()
-        all_states = states_resp.json()
+            stream=True,
+        ) as states_resp:
+            if states_resp.status_code == 401:
+                return HAFetchError(
+                    "invalid_token",
+                    "HA API returned 401 Unauthorized -- check HA_TOKEN",
+                )
+            states_resp.raise_for_status()
+            all_states = _parse_states(states_resp)
     except requests.RequestException as e:
         logger.error("HA API error: %s", e)
         return HAFetchError("ha_unreachable", str(e)[:500])
+    except Exception as e:
+        # Truncated or malformed body (ijson / json errors)
+        logger.error("Invalid /api/states response: %s", e)
+        return HAFetchError("ha_unreachable", f"Invalid /api/states response: {str(e)[:450]}")
 
-    # Area registry is optional — not available on all HA versions/configurations.
-    # If unavailable, entities will get name-only utterances (no area context).
-    area_map: dict[str, str] = {}
-    try:
-        area_resp = requests.get(
-            f"{HA_URL}/api/config/area_registry/list",
-            headers=_ha_headers(),
-            timeout=15,
-        )
-        if area_resp.ok:
-            area_map = {a["area_id"]: a["name"] for a in area_resp.json()}
-    except requests.RequestException:
-        pass
+    area_map = fetch_area_map(refresh=True)
 
     entities = []
     for s in all_states:
-        entity_id = s.get("entity_id", "")
+        entity_id = s.entity_id
         domain = entity_id.split(".")[0] if "." in entity_id else ""
-        attrs = s.get("attributes", {})
-        friendly_name = attrs.get("friendly_name") or _fallback_name(entity_id)
-        area_id = attrs.get("area_id")
+        friendly_name = s.friendly_name or _fallback_name(entity_id)
+        area_id = s.area_id
         area_name = area_map.get(area_id) if area_id else None
 
         entities.append(
@@ -486,17 +751,65 @@ def fetch_ha_entities() -> list[dict] | HAFetchError:
                 "area_id": area_id,
                 "area_name": area_name,
                 "aliases": [],
-                "device_class": attrs.get("device_class"),
+                "device_class": s.device_class,
             }
         )
 
     return entities
 
 
-def fetch_single_entity(entity_id: str) -> dict | None:
-    """Fetch a single entity from HA /api/states/{entity_id}. Returns None on error."""
+_area_cache: dict[str, str] | None = None
+_area_cache_at = 0.0
+_area_cache_lock = threading.Lock()
+
+
+def invalidate_area_cache():
+    """Drop the cached area registry; the next lookup fetches it from HA."""
+    global _area_cache
+    with _area_cache_lock:
+        _area_cache = None
+    logger.info("Area cache invalidated")
+
+
+def fetch_area_map(http=requests, refresh: bool = False) -> dict[str, str]:
+    """
+    Return area_id -> area name from the HA area registry, cached for
+    AREA_CACHE_TTL seconds (refresh=True bypasses the cache).
+    The registry is optional -- not available on all HA versions/configurations.
+    If unavailable, entities will get name-only utterances (no area context);
+    a previously cached registry is kept and used instead.
+    """
+    global _area_cache, _area_cache_at
+    with _area_cache_lock:
+        if (
+            not refresh
+            and _area_cache is not None
+            and time.monotonic() - _area_cache_at < AREA_CACHE_TTL
+        ):
+            return _area_cache
+        stale = _area_cache
+
+    try:
+        area_resp = http.get(
+            f"{HA_URL}/api/config/area_registry/list",
+            headers=_ha_headers(),
+            timeout=15,
+        )
+        if area_resp.ok:
+            area_map = {a["area_id"]: a["name"] for a in area_resp.json()}
+            with _area_cache_lock:
+                _area_cache = area_map
+                _area_cache_at = time.monotonic()
+            return area_map
+    except requests.RequestException:
+        pass
+    return stale or {}
+
+
+def _fetch_entity_state(entity_id: str, http=requests) -> dict | None:
+    """Fetch one entity from HA /api/states/{entity_id} without area name. None on error."""
     try:
-        state_resp = requests.get(
+        state_resp = http.get(
             f"{HA_URL}/api/states/{entity_id}",
             headers=_ha_headers(),
             timeout=15,
@@ -512,34 +825,41 @@ def fetch_single_entity(entity_id: str) -> dict | None:
     attrs = s.get("attributes", {})
     domain = entity_id.split(".")[0] if "." in entity_id else ""
     friendly_name = attrs.get("friendly_name") or _fallback_name(entity_id)
-    area_id = attrs.get("area_id")
-
-    area_name = None
-    if area_id:
-        try:
-            area_resp = requests.get(
-                f"{HA_URL}/api/config/area_registry/list",
-                headers=_ha_headers(),
-                timeout=15,
-            )
-            if area_resp.ok:
-                areas = area_resp.json()
-                match = next((a for a in areas if a["area_id"] == area_id), None)
-                area_name = match["name"] if match else None
-        except requests.RequestException:
-            pass
 
     return {
         "entity_id": entity_id,
         "domain": domain,
         "friendly_name": friendly_name,
-        "area_id": area_id,
-        "area_name": area_name,
+        "area_id": attrs.get("area_id"),
+        "area_name": None,
         "aliases": [],
         "device_class": attrs.get("device_class"),
     }
 
 
+def fetch_entities(entity_ids: list[str]) -> tuple[dict[str, dict], list[str]]:
+    """
+    Fetch several entities from HA over one HTTP session. The area registry is
+    fetched at most once. Returns (entity_id -> entity, failed entity_ids).
+    """
+    fetched: dict[str, dict] = {}
+    failed: list[str] = []
+    with requests.Session() as http:
+        for entity_id in entity_ids:
+            entity = _fetch_entity_state(entity_id, http)
+            if entity is None:
+                failed.append(entity_id)
+            else:
+                fetched[entity_id] = entity
+
+        if any(e["area_id"] for e in fetched.values()):
+            area_map = fetch_area_map(http)
+            for e in fetched.values():
+                if e["area_id"]:
+                    e["area_name"] = area_map.get(e["area_id"])
+    return fetched, failed
+
+
 def _fallback_name(entity_id: str) -> str:
     """Extract a human-readable name from entity_id (e.g. light.wohnzimmer_decke -> wohnzimmer decke)."""
     parts = entity_id.split(".", 1)
@@ -549,94 +869,354 @@ def _fallback_name(entity_id: str) -> str:
 
 
 # ---------------------------------------------------------------------------
-# Utterance generation
+# Home Assistant WebSocket (optional, HA_WEBSOCKET_ENABLED)
 # ---------------------------------------------------------------------------
-def build_template_map(templates: list[dict]) -> dict[str, list[dict]]:
-    """Build a lookup: domain -> list of template dicts."""
-    tmap: dict[str, list[dict]] = {}
-    for t in templates:
-        d = t["domain"]
-        if d not in tmap:
-            tmap[d] = []
-        tmap[d].append(t)
-    return tmap
+def _ha_websocket_url() -> str:
+    if HA_WEBSOCKET_URL:
+        return HA_WEBSOCKET_URL
+    parsed = urlparse(HA_URL)
+    scheme = "wss" if parsed.scheme == "https" else "ws"
+    return f"{scheme}://{parsed.netloc}/api/websocket"
 
 
-def generate_utterances(entity: dict, template_map: dict[str, list[dict]]) -> list[dict]:
-    """Generate Weaviate HAIntent utterance objects for a single entity."""
-    domain = entity["domain"]
-    name = entity.get("friendly_name") or _fallback_name(entity["entity_id"])
-    area = entity.get("area_name")
-    aliases = entity.get("aliases", []) if isinstance(entity.get("aliases"), list) else []
-    names = [name] + [a for a in aliases if a]
-
-    # Get templates for this domain
-    domain_templates = template_map.get(domain, [])
-    if not domain_templates:
-        return []
+def translate_ha_event(event_type: str, data: dict) -> list[dict]:
+    """
+    Map a HA registry event to worker queue payloads (same shape as the MQTT
+    events, with source=websocket). Irrelevant updates map to [].
+    """
+    action = data.get("action")
+    if event_type == "entity_registry_updated":
+        entity_id = data.get("entity_id", "")
+        if action == "create":
+            return [{"event": "entity_created", "entity_id": entity_id, "source": "websocket"}]
+        if action == "remove":
+            return [{"event": "entity_removed", "entity_id": entity_id, "source": "websocket"}]
+        if action == "update":
+            changes = data.get("changes")
+            if changes is not None and not _RELEVANT_ENTITY_CHANGES & set(changes):
+                return []
+            payloads = []
+            if data.get("old_entity_id"):
+                payloads.append(
+                    {"event": "entity_removed", "entity_id": data["old_entity_id"], "source": "websocket"}
+                )
+            payloads.append({"event": "entity_created", "entity_id": entity_id, "source": "websocket"})
+            return payloads
+    elif event_type == "area_registry_updated":
+        if action == "create":
+            return []  # no entity can be in a new area yet
+        return [
+            {
+                "event": "area_registry_updated",
+                "action": action,
+                "area_id": data.get("area_id"),
+                "source": "websocket",
+            }
+        ]
+    return []
 
-    utterances = []
-    seen = set()
 
-    for tpl in domain_templates:
-        patterns = tpl.get("patterns", [])
-        if isinstance(patterns, str):
-            try:
-                patterns = json.loads(patterns)
-            except json.JSONDecodeError:
-                patterns = []
-        if not isinstance(patterns, list):
-            continue
+class HAWebSocketListener:
+    """
+    Persistent HA WebSocket connection subscribed to entity_registry_updated
+    and area_registry_updated. Events are translated into worker queue
+    payloads. Reconnects with backoff; after a reconnect a full sync is queued
+    because events may have been missed while disconnected.
+    """
+
+    SUBSCRIPTIONS = ("entity_registry_updated", "area_registry_updated")
+
+    def __init__(self, url: str, token: str, event_queue: queue.Queue):
+        self.url = url
+        self.token = token
+        self.event_queue = event_queue
+        self._msg_id = 0
+        self._stop = threading.Event()
+        self._ws = None
 
-        for pattern in patterns:
-            if not isinstance(pattern, str):
+    def start(self):
+        thread = threading.Thread(target=self._run, name="ha-websocket", daemon=True)
+        thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._ws is not None:
+            try:
+                self._ws.close()
+            except Exception:
+                pass
+
+    def _send(self, payload: dict) -> int:
+        self._msg_id += 1
+        self._ws.send(json.dumps({"id": self._msg_id, **payload}))
+        return self._msg_id
+
+    def _connect(self):
+        import websocket  # websocket-client, only needed in WebSocket mode
+
+        self._ws = websocket.create_connection(self.url, timeout=HA_WEBSOCKET_PING_INTERVAL)
+        self._msg_id = 0
+        if json.loads(self._ws.recv()).get("type") != "auth_required":
+            raise ConnectionError("unexpected HA WebSocket greeting")
+        self._ws.send(json.dumps({"type": "auth", "access_token": self.token}))
+        reply = json.loads(self._ws.recv())
+        if reply.get("type") != "auth_ok":
+            raise PermissionError(f"HA WebSocket auth failed: {reply.get('message', reply.get('type'))}")
+        for event_type in self.SUBSCRIPTIONS:
+            self._send({"type": "subscribe_events", "event_type": event_type})
+
+    def _run(self):
+        import websocket
+
+        backoff = 1
+        connected_before = False
+        while not self._stop.is_set():
+            try:
+                self._connect()
+                backoff = 1
+                logger.info("HA WebSocket connected (%s)", self.url)
+                if connected_before:
+                    self.event_queue.put({"event": "websocket_reconnected", "source": "websocket"})
+                connected_before = True
+                self._listen(websocket)
+            except PermissionError as e:
+                logger.error("%s", e)
+                backoff = 60
+            except Exception as e:
+                if not self._stop.is_set():
+                    logger.warning("HA WebSocket error: %s", e)
+            finally:
+                if self._ws is not None:
+                    try:
+                        self._ws.close()
+                    except Exception:
+                        pass
+            if self._stop.wait(backoff):
+                break
+            backoff = min(backoff * 2, 60)
+
+    def _listen(self, websocket):
+        while not self._stop.is_set():
+            try:
+                message = json.loads(self._ws.recv())
+            except websocket.WebSocketTimeoutException:
+                self._send({"type": "ping"})
                 continue
-            # Skip patterns with value placeholders
-            if any(p in pattern for p in ("{value}", "{message}", "{temperature}")):
+
+            if message.get("type") == "result" and not message.get("success", True):
+                logger.error("HA WebSocket command %s failed: %s", message.get("id"), message.get("error"))
+            if message.get("type") != "event":
                 continue
 
-            for n in names:
-                variants = []
-
-                if "{where}" in pattern:
-                    variants.append(pattern.replace("{where}", n))
-                    if area:
-                        variants.append(pattern.replace("{where}", area))
-                elif "{name}" in pattern and "{area}" in pattern:
-                    if area:
-                        variants.append(
-                            pattern.replace("{name}", n).replace("{area}", area)
-                        )
-                elif "{name}" in pattern:
-                    variants.append(pattern.replace("{name}", n))
-                elif "{area}" in pattern:
-                    if area:
-                        variants.append(pattern.replace("{area}", area))
+            event = message.get("event", {})
+            for payload in translate_ha_event(event.get("event_type", ""), event.get("data", {})):
+                logger.info(
+                    "Received HA WebSocket event: %s %s",
+                    payload["event"],
+                    payload.get("entity_id") or payload.get("area_id") or "",
+                )
+                self.event_queue.put(payload)
+
+
+# ---------------------------------------------------------------------------
+# Utterance generation
+# ---------------------------------------------------------------------------
+# Minimal fallback parser for templates stored without pattern_slots
+# (seed/manual templates, rows from before migration 014). The stored
+# signatures written by hassil-parser (expand_ha_intents.pattern_slot_signature)
+# are the source of truth and are used whenever present. _SLOT_RE, _VALUE_SLOTS
+# and _scan_pattern_slots are a copy of that code: change both together.
+# Slot placeholders in template patterns ({name}, {area}, {where}, ...)
+_SLOT_RE = re.compile(r"\{(\w+)\}")
+# Patterns with these slots need a runtime value and get no utterances
+_VALUE_SLOTS = frozenset({"value", "message", "temperature"})
+
+
+def _scan_pattern_slots(pattern: str) -> dict:
+    """
+    Fallback slot signature of a pattern, same format as the pattern_slots
+    hassil-parser stores: {"slots": [...], "skip": bool, "offsets": [[slot, start, end], ...]}.
+    Only used for templates without stored pattern_slots.
+    """
+    offsets = [[m.group(1), m.start(), m.end()] for m in _SLOT_RE.finditer(pattern)]
+    slots = list(dict.fromkeys(slot for slot, _, _ in offsets))
+    return {
+        "slots": slots,
+        "skip": any(slot in _VALUE_SLOTS for slot in slots),
+        "offsets": offsets,
+    }
+
+
+def _pattern_signatures(tpl: dict, patterns: list) -> list[dict | None]:
+    """
+    Stored slot signatures of a template's patterns. Only templates without
+    usable pattern_slots are scanned with the fallback parser.
+    """
+    signatures = tpl.get("pattern_slots")
+    if isinstance(signatures, str):
+        try:
+            signatures = json.loads(signatures)
+        except json.JSONDecodeError:
+            signatures = None
+    if isinstance(signatures, list) and len(signatures) == len(patterns):
+        return signatures
+    if signatures is not None:
+        logger.warning(
+            "Ignoring invalid pattern_slots of template %s:%s, scanning its patterns",
+            tpl.get("domain"),
+            tpl.get("intent"),
+        )
+    return [_scan_pattern_slots(p) if isinstance(p, str) else None for p in patterns]
+
+
+class _CompiledTemplate(NamedTuple):
+    """One intent template, pre-parsed once per sync for fill-in."""
+
+    service: str
+    language: str
+    intent_template: str
+    parameters: str  # JSON string shared by all utterances of this template
+    patterns: tuple  # ((kind, fill), ...), see _compile_pattern
+
+
+def _compile_pattern(pattern, signature: dict | None) -> tuple[str, str] | None:
+    """
+    Turn a pattern into (kind, fill) or None if it yields no utterances.
+
+    kind selects which entity values are filled in (same precedence as the
+    placeholders were always handled): "where", "name_area", "name", "area",
+    or "suffix" for patterns without those slots (the name is appended).
+    fill is a str.format template with the selected slots as positional
+    fields; all other text, including other slots, is escaped literal text.
+    """
+    if not isinstance(pattern, str) or not signature or signature["skip"]:
+        return None
+
+    slots = signature["slots"]
+    if "where" in slots:
+        kind, order = "where", ("where",)
+    elif "name" in slots and "area" in slots:
+        kind, order = "name_area", ("name", "area")
+    elif "name" in slots:
+        kind, order = "name", ("name",)
+    elif "area" in slots:
+        kind, order = "area", ("area",)
+    else:
+        return "suffix", pattern + " "
+
+    parts = []
+    pos = 0
+    for slot, start, end in signature["offsets"]:
+        if slot in order:
+            parts.append(pattern[pos:start].replace("{", "{{").replace("}", "}}"))
+            parts.append("{%d}" % order.index(slot))
+            pos = end
+    parts.append(pattern[pos:].replace("{", "{{").replace("}", "}}"))
+    return kind, "".join(parts)
+
+
+def _compile_template(tpl: dict) -> _CompiledTemplate | None:
+    patterns = tpl.get("patterns", [])
+    if isinstance(patterns, str):
+        try:
+            patterns = json.loads(patterns)
+        except json.JSONDecodeError:
+            patterns = []
+    if not isinstance(patterns, list):
+        return None
+
+    default_params = tpl.get("default_parameters", {})
+    if isinstance(default_params, str):
+        try:
+            default_params = json.loads(default_params)
+        except json.JSONDecodeError:
+            default_params = {}
+
+    compiled = tuple(
+        c
+        for c in (
+            _compile_pattern(pattern, signature)
+            for pattern, signature in zip(patterns, _pattern_signatures(tpl, patterns))
+        )
+        if c is not None
+    )
+    return _CompiledTemplate(
+        service=tpl["service"],
+        language=tpl.get("language", "de"),
+        intent_template=f"{tpl['domain']}:{tpl['intent']}",
+        parameters=json.dumps(default_params or {}),
+        patterns=compiled,
+    )
+
+
+def build_template_map(templates: list[dict]) -> dict[str, list[_CompiledTemplate]]:
+    """
+    Build a lookup: domain -> compiled templates. Patterns, default parameters
+    and slot signatures are parsed here once per sync, not per entity.
+    Domains stay in the map even if none of their patterns are usable.
+    """
+    tmap: dict[str, list[_CompiledTemplate]] = {}
+    for t in templates:
+        compiled = _compile_template(t)
+        tmap.setdefault(t["domain"], [])
+        if compiled is not None and compiled.patterns:
+            tmap[t["domain"]].append(compiled)
+    return tmap
+
+
+def generate_domain_utterances(
+    entities: list[dict], domain_templates: list[_CompiledTemplate]
+) -> list[dict]:
+    """
+    Generate Weaviate HAIntent utterance objects for all entities of one
+    domain in a single pass over its compiled templates. Utterances are
+    deduplicated per entity.
+    """
+    utterances: list[dict] = []
+    if not domain_templates:
+        return utterances
+
+    for entity in entities:
+        entity_id = entity["entity_id"]
+        domain = entity["domain"]
+        name = entity.get("friendly_name") or _fallback_name(entity_id)
+        area = entity.get("area_name")
+        aliases = entity.get("aliases", []) if isinstance(entity.get("aliases"), list) else []
+        names = [name] + [a for a in aliases if a]
+        seen: set[str] = set()
+
+        for tpl in domain_templates:
+            for kind, fill in tpl.patterns:
+                if kind == "area":
+                    # Does not depend on the name: one utterance per entity
+                    candidates = [fill.format(area)] if area else []
+                elif kind == "name_area":
+                    candidates = [fill.format(n, area) for n in names] if area else []
+                elif kind == "where":
+                    candidates = []
+                    for n in names:
+                        candidates.append(fill.format(n))
+                        if area:
+                            candidates.append(fill.format(area))
+                elif kind == "name":
+                    candidates = [fill.format(n) for n in names]
                 else:
-                    variants.append(pattern + " " + n)
+                    candidates = [fill + n for n in names]
 
-                for utt in variants:
+                for utt in candidates:
                     utt = utt.strip()
                     if not utt or utt in seen:
                         continue
                     seen.add(utt)
-
-                    default_params = tpl.get("default_parameters", {})
-                    if isinstance(default_params, str):
-                        try:
-                            default_params = json.loads(default_params)
-                        except json.JSONDecodeError:
-                            default_params = {}
-
                     utterances.append(
                         {
                             "utterance": utt,
-                            "entityId": entity["entity_id"],
+                            "entityId": entity_id,
                             "domain": domain,
-                            "service": tpl["service"],
-                            "parameters": json.dumps(default_params or {}),
-                            "language": tpl.get("language", "de"),
-                            "intentTemplate": f"{domain}:{tpl['intent']}",
+                            "service": tpl.service,
+                            "parameters": tpl.parameters,
+                            "language": tpl.language,
+                            "intentTemplate": tpl.intent_template,
                             "certaintyThreshold": CERTAINTY_THRESHOLD,
                         }
                     )
@@ -644,48 +1224,258 @@ def generate_utterances(entity: dict, template_map: dict[str, list[dict]]) -> li
     return utterances
 
 
+def generate_utterances(entity: dict, template_map: dict[str, list[_CompiledTemplate]]) -> list[dict]:
+    """Generate Weaviate HAIntent utterance objects for a single entity."""
+    return generate_domain_utterances([entity], template_map.get(entity["domain"], []))
+
+
 # ---------------------------------------------------------------------------
 # Weaviate operations
 # ---------------------------------------------------------------------------
-def get_weaviate_client():
-    """Create a Weaviate v4 client."""
+_weaviate_url = urlparse(WEAVIATE_URL)
+_weaviate_client = None
+_weaviate_checked_at = 0.0
+_weaviate_lock = threading.Lock()
+
+
+def _connect_weaviate():
+    """Create a Weaviate v4 client (HTTP + gRPC)."""
+    host = _weaviate_url.hostname or "weaviate"
     return weaviate.connect_to_custom(
-        http_host=urlparse(WEAVIATE_URL).hostname or "weaviate",
-        http_port=urlparse(WEAVIATE_URL).port or 8080,
+        http_host=host,
+        http_port=_weaviate_url.port or 8080,
         http_secure=False,
-        grpc_host=urlparse(WEAVIATE_URL).hostname or "weaviate",
+        grpc_host=host,
         grpc_port=50051,
         grpc_secure=False,
     )
 
 
+def _close_client(client):
+    try:
+        client.close()
+    except Exception as e:
+        logger.debug("Closing Weaviate client failed: %s", e)
+
+
+def get_weaviate_client():
+    """
+    Return the shared Weaviate client of this worker process.
+    The client is created on first use and checked with is_ready() at most
+    every WEAVIATE_HEALTH_CHECK_INTERVAL seconds; an unhealthy client is
+    replaced by a fresh connection. Callers must not close it.
+    """
+    global _weaviate_client, _weaviate_checked_at
+    with _weaviate_lock:
+        now = time.monotonic()
+        if _weaviate_client is not None and now - _weaviate_checked_at >= WEAVIATE_HEALTH_CHECK_INTERVAL:
+            try:
+                healthy = _weaviate_client.is_ready()
+            except Exception:
+                healthy = False
+            if healthy:
+                _weaviate_checked_at = now
+            else:
+                logger.warning("Weaviate client not ready, reconnecting")
+                _close_client(_weaviate_client)
+                _weaviate_client = None
+
+        if _weaviate_client is None:
+            _weaviate_client = _connect_weaviate()
+            _weaviate_checked_at = now
+        return _weaviate_client
+
+
+def reset_weaviate_client():
+    """Drop the shared client after a connection error; the next call reconnects."""
+    global _weaviate_client
+    with _weaviate_lock:
+        if _weaviate_client is not None:
+            _close_client(_weaviate_client)
+            _weaviate_client = None
+
+
 def weaviate_delete_by_entity(entity_ids: list[str]) -> tuple[int, list[str]]:
     """Delete all HAIntent objects for the given entity_ids. Returns (deleted_count, errors)."""
     if not entity_ids:
         return 0, []
 
+    ids = list(dict.fromkeys(entity_ids))
+    chunks = [
+        ids[i : i + WEAVIATE_DELETE_CHUNK_SIZE]
+        for i in range(0, len(ids), WEAVIATE_DELETE_CHUNK_SIZE)
+    ]
+
     deleted = 0
     errors = []
     try:
-        client = get_weaviate_client()
-        collection = client.collections.get("HAIntent")
-        for eid in entity_ids:
+        collection = get_weaviate_client().collections.get("HAIntent")
+
+        def delete_chunk(chunk: list[str]) -> tuple[int, str | None]:
+            count = 0
             try:
-                result = collection.data.delete_many(
-                    where=Filter.by_property("entityId").equal(eid)
-                )
-                deleted += result.successful
+                while True:
+                    result = collection.data.delete_many(
+                        where=Filter.by_property("entityId").contains_any(chunk)
+                    )
+                    count += result.successful
+                    if result.matches < WEAVIATE_QUERY_MAXIMUM_RESULTS or result.successful == 0:
+                        return count, None
             except Exception as e:
-                errors.append(f"Delete failed for {eid}: {str(e)[:200]}")
-        client.close()
+                return count, (
+                    f"Delete failed for {len(chunk)} entities "
+                    f"({chunk[0]} .. {chunk[-1]}): {str(e)[:200]}"
+                )
+
+        workers = min(WEAVIATE_DELETE_CONCURRENCY, len(chunks))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for count, error in pool.map(delete_chunk, chunks):
+                deleted += count
+                if error:
+                    errors.append(error)
     except Exception as e:
+        reset_weaviate_client()
         errors.append(f"Weaviate connection error: {str(e)[:200]}")
 
+    logger.info(
+        "Weaviate delete: %d objects for %d entities (%d chunks, %d errors)",
+        deleted,
+        len(ids),
+        len(chunks),
+        len(errors),
+    )
     return deleted, errors
 
 
+def utterance_uuid(utt: dict) -> str:
+    """Deterministic HAIntent object UUID derived from (entityId, utterance, service)."""
+    return generate_uuid5(
+        json.dumps([utt["entityId"], utt["utterance"], utt["service"]], ensure_ascii=False)
+    )
+
+
+def _weaviate_scan_objects(collection, entity_ids: set[str]) -> dict[str, dict]:
+    """uuid -> properties of the given entities' objects via one cursor scan (no result cap)."""
+    existing: dict[str, dict] = {}
+    for obj in collection.iterator(return_properties=HAINTENT_PROPERTIES):
+        if obj.properties.get("entityId") in entity_ids:
+            existing[str(obj.uuid)] = obj.properties
+    return existing
+
+
+def _weaviate_existing_objects(collection, entity_ids: set[str]) -> dict[str, dict]:
+    """
+    Return uuid -> properties of all HAIntent objects of the given entities.
+    Small scopes are queried per entity with offset paging; if one entity has
+    more objects than offset paging can reach (QUERY_MAXIMUM_RESULTS), or the
+    scope is large, the collection is scanned with the cursor iterator instead.
+    """
+    if not entity_ids:
+        return {}
+    if len(entity_ids) > RECONCILE_SCAN_THRESHOLD:
+        return _weaviate_scan_objects(collection, entity_ids)
+
+    existing: dict[str, dict] = {}
+    for entity_id in sorted(entity_ids):
+        entity_filter = Filter.by_property("entityId").equal(entity_id)
+        offset = 0
+        while True:
+            if offset + RECONCILE_PAGE_SIZE > WEAVIATE_QUERY_MAXIMUM_RESULTS:
+                logger.warning(
+                    "%s has %d+ HAIntent objects (beyond offset paging), scanning the collection",
+                    entity_id,
+                    offset,
+                )
+                return _weaviate_scan_objects(collection, entity_ids)
+            response = collection.query.fetch_objects(
+                filters=entity_filter,
+                limit=RECONCILE_PAGE_SIZE,
+                offset=offset,
+                return_properties=HAINTENT_PROPERTIES,
+            )
+            for obj in response.objects:
+                existing[str(obj.uuid)] = obj.properties
+            if len(response.objects) < RECONCILE_PAGE_SIZE:
+                break
+            offset += RECONCILE_PAGE_SIZE
+    return existing
+
+
+def _weaviate_delete_ids(collection, uuids: list[str]) -> tuple[int, list[str]]:
+    """Delete HAIntent objects by id in chunks. Returns (deleted_count, errors)."""
+    deleted = 0
+    errors = []
+    for i in range(0, len(uuids), RECONCILE_DELETE_CHUNK):
+        chunk = uuids[i : i + RECONCILE_DELETE_CHUNK]
+        try:
+            result = collection.data.delete_many(where=Filter.by_id().contains_any(chunk))
+            deleted += result.successful
+        except Exception as e:
+            errors.append(f"Delete of {len(chunk)} stale objects failed: {str(e)[:200]}")
+    return deleted, errors
+
+
+def weaviate_reconcile(entity_ids: list[str], utterances: list[dict]) -> dict:
+    """
+    Make the HAIntent objects of entity_ids match utterances (the complete
+    desired set for those entities) without touching unchanged objects:
+      - desired objects whose UUID does not exist yet are inserted
+      - existing objects with different properties are re-added (overwritten)
+      - existing objects whose UUID is not desired any more are deleted
+    Only inserted/re-added objects are vectorised again.
+
+    Returns counts {"inserted", "updated", "unchanged", "deleted", "failed"}
+    and "errors".
+    """
+    result = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0, "failed": 0, "errors": []}
+    desired = {utterance_uuid(utt): utt for utt in utterances}
+    scope = set(entity_ids) | {utt["entityId"] for utt in utterances}
+
+    try:
+        collection = get_weaviate_client().collections.get("HAIntent")
+        existing = _weaviate_existing_objects(collection, scope)
+
+        stale = [uid for uid in existing if uid not in desired]
+        result["deleted"], delete_errors = _weaviate_delete_ids(collection, stale)
+        result["errors"].extend(delete_errors)
+    except Exception as e:
+        reset_weaviate_client()
+        result["errors"].append(f"Weaviate connection error: {str(e)[:200]}")
+        result["failed"] = len(utterances)
+        return result
+
+    new = [utt for uid, utt in desired.items() if uid not in existing]
+    changed = [
+        utt
+        for uid, utt in desired.items()
+        if uid in existing and any(existing[uid].get(k) != v for k, v in utt.items())
+    ]
+    result["unchanged"] = len(desired) - len(new) - len(changed)
+
+    for key, objects in (("inserted", new), ("updated", changed)):
+        ok, failed, errors = weaviate_batch_insert(objects)
+        result[key] = ok
+        result["failed"] += failed
+        result["errors"].extend(errors)
+
+    logger.info(
+        "Weaviate reconcile (%d entities): %d inserted, %d updated, %d unchanged, %d deleted, %d failed",
+        len(scope),
+        result["inserted"],
+        result["updated"],
+        result["unchanged"],
+        result["deleted"],
+        result["failed"],
+    )
+    return result
+
+
 def weaviate_batch_insert(utterances: list[dict]) -> tuple[int, int, list[str]]:
-    """Insert utterances into Weaviate HAIntent in batches. Returns (inserted, failed, errors)."""
+    """
+    Insert utterances into Weaviate HAIntent in batches (deterministic UUIDs,
+    so an existing object with the same UUID is overwritten).
+    Returns (inserted, failed, errors).
+    """
     if not utterances:
         return 0, 0, []
 
@@ -694,8 +1484,7 @@ def weaviate_batch_insert(utterances: list[dict]) -> tuple[int, int, list[str]]:
     errors = []
 
     try:
-        client = get_weaviate_client()
-        collection = client.collections.get("HAIntent")
+        collection = get_weaviate_client().collections.get("HAIntent")
 
         for i in range(0, len(utterances), WEAVIATE_BATCH_SIZE):
             batch = utterances[i : i + WEAVIATE_BATCH_SIZE]
@@ -704,7 +1493,7 @@ def weaviate_batch_insert(utterances: list[dict]) -> tuple[int, int, list[str]]:
             try:
                 with collection.batch.dynamic() as batch_inserter:
                     for utt in batch:
-                        batch_inserter.add_object(properties=utt)
+                        batch_inserter.add_object(properties=utt, uuid=utterance_uuid(utt))
 
                 # Check for errors using the context manager instance (not collection.batch,
                 # which creates a new empty batch object and always returns failed_objects=[])
@@ -717,9 +1506,8 @@ def weaviate_batch_insert(utterances: list[dict]) -> tuple[int, int, list[str]]:
             except Exception as e:
                 errors.append(f"Batch {batch_num} error: {str(e)[:200]}")
                 total_failed += len(batch)
-
-        client.close()
     except Exception as e:
+        reset_weaviate_client()
         errors.append(f"Weaviate connection error: {str(e)[:200]}")
         total_failed += len(utterances) - total_inserted
 
@@ -764,6 +1552,19 @@ def publish_error(mqtt_client: MQTTClient, event: str, **kwargs):
 # ---------------------------------------------------------------------------
 # Sync operations
 # ---------------------------------------------------------------------------
+def _sync_status(errors: list[str], written: int, failed: int) -> str:
+    """
+    Final status of a sync from its Weaviate results: "error" if writes were
+    attempted and none succeeded, "partial" for any other error (e.g. failed
+    deletes when nothing had to be written), otherwise "success".
+    """
+    if not errors:
+        return "success"
+    if failed and not written:
+        return "error"
+    return "partial"
+
+
 def full_sync(mqtt_client: MQTTClient, trigger_source: str, force_all: bool = False):
     """Execute a full sync of all HA entities.
 
@@ -833,43 +1634,69 @@ def full_sync(mqtt_client: MQTTClient, trigger_source: str, force_all: bool = Fa
             updated.append(e)
     removed_ids = [eid for eid in existing_ids if eid not in incoming_ids]
 
-    # 4. Load templates
+    # 4. Load templates (compiled once for this sync). Without templates every
+    #    utterance would count as stale, so abort instead of wiping Weaviate.
     templates = load_templates()
+    if templates is None:
+        error_msg = "Failed to load intent templates from PostgreSQL"
+        publish_error(mqtt_client, "sync_failed", message=error_msg)
+        update_sync_log(log_id, "error", entities_found=len(ha_entities), error_message=error_msg)
+        return
     template_map = build_template_map(templates)
 
-    # 5. Generate utterances for added + updated entities
+    # 5. Generate utterances for added + updated entities, one batch per domain
     #    When force_all=True (templates_updated), reprocess ALL entities so that
     #    new/changed templates are applied even if no entity name/area changed.
     to_process = ha_entities if force_all else added + updated
     all_utterances = []
     warnings = []
 
-    warned_domains: set[str] = set()
+    entities_by_domain: dict[str, list[dict]] = {}
     for entity in to_process:
-        utts = generate_utterances(entity, template_map)
-        if not utts and entity["domain"] not in template_map:
-            if entity["domain"] not in warned_domains:
-                warned_domains.add(entity["domain"])
-                warnings.append(f"No template for domain: {entity['domain']}")
-                publish_warning(
-                    mqtt_client,
-                    "no_template",
-                    entity_id=entity["entity_id"],
-                    domain=entity["domain"],
-                    message=f"No template for domain {entity['domain']} (skipping all entities of this domain)",
-                )
-        all_utterances.extend(utts)
+        entities_by_domain.setdefault(entity["domain"], []).append(entity)
 
-    # 6. Delete Weaviate objects for entities that will be reprocessed + removed
-    #    When force_all, delete all existing entities' Weaviate objects before reinserting.
-    if force_all:
-        delete_ids = [e["entity_id"] for e in ha_entities]
+    for domain, domain_entities in entities_by_domain.items():
+        if domain not in template_map:
+            warnings.append(f"No template for domain: {domain}")
+            publish_warning(
+                mqtt_client,
+                "no_template",
+                entity_id=domain_entities[0]["entity_id"],
+                domain=domain,
+                message=f"No template for domain {domain} (skipping all entities of this domain)",
+            )
+            continue
+        all_utterances.extend(generate_domain_utterances(domain_entities, template_map[domain]))
+
+    # Entities of domains without templates keep their Weaviate objects: a
+    # missing domain may only mean the templates are incomplete
+    synced = [e for e in to_process if e["domain"] in template_map]
+
+    weaviate_details: dict = {"mode": WEAVIATE_SYNC_MODE}
+    if WEAVIATE_SYNC_MODE == "reconcile":
+        # 6+7. Diff the desired utterances of reprocessed entities (and none for
+        #      removed entities) against Weaviate; only the delta is written.
+        reconciled = weaviate_reconcile(
+            [e["entity_id"] for e in synced] + removed_ids, all_utterances
+        )
+        weaviate_deleted = reconciled["deleted"]
+        weaviate_inserted = reconciled["inserted"] + reconciled["updated"]
+        weaviate_failed = reconciled["failed"]
+        delete_errors, insert_errors = [], reconciled["errors"]
+        weaviate_details.update(
+            {k: reconciled[k] for k in ("inserted", "updated", "unchanged", "deleted", "failed")}
+        )
     else:
-        delete_ids = [e["entity_id"] for e in updated] + removed_ids
-    weaviate_deleted, delete_errors = weaviate_delete_by_entity(delete_ids)
+        # 6. Delete Weaviate objects for entities that will be reprocessed + removed
+        #    When force_all, delete all existing entities' Weaviate objects before reinserting.
+        if force_all:
+            delete_ids = [e["entity_id"] for e in synced]
+        else:
+            delete_ids = [e["entity_id"] for e in updated if e["domain"] in template_map] + removed_ids
+        weaviate_deleted, delete_errors = weaviate_delete_by_entity(delete_ids)
 
-    # 7. Batch insert new utterances into Weaviate
-    weaviate_inserted, weaviate_failed, insert_errors = weaviate_batch_insert(all_utterances)
+        # 7. Batch insert new utterances into Weaviate
+        weaviate_inserted, weaviate_failed, insert_errors = weaviate_batch_insert(all_utterances)
 
     # 8. Upsert entities in PostgreSQL
     upsert_entities(to_process)
@@ -877,12 +1704,7 @@ def full_sync(mqtt_client: MQTTClient, trigger_source: str, force_all: bool = Fa
 
     # 9. Determine final status
     all_errors = delete_errors + insert_errors
-    if all_errors and weaviate_inserted > 0:
-        final_status = "partial"
-    elif all_errors and weaviate_inserted == 0 and len(all_utterances) > 0:
-        final_status = "error"
-    else:
-        final_status = "success"
+    final_status = _sync_status(all_errors, weaviate_inserted, weaviate_failed)
 
     duration_ms = int((time.time() - start_time) * 1000)
 
@@ -894,10 +1716,16 @@ def full_sync(mqtt_client: MQTTClient, trigger_source: str, force_all: bool = Fa
         entities_added=len(added),
         entities_updated=len(updated),
         entities_removed=len(removed_ids),
-        intents_generated=weaviate_inserted,
+        intents_generated=len(all_utterances),
         intents_removed=weaviate_deleted,
         error_message="; ".join(all_errors)[:500] if all_errors else None,
-        details={"warnings": warnings, "batch_errors": all_errors},
+        details={
+            "intents_written": weaviate_inserted,
+            "warnings": warnings,
+            "batch_errors": all_errors,
+            "weaviate": weaviate_details,
+            "db_pool": db_pool_stats(),
+        },
     )
 
     # 11. Publish result
@@ -938,19 +1766,45 @@ def full_sync(mqtt_client: MQTTClient, trigger_source: str, force_all: bool = Fa
     )
 
 
+def _entity_unchanged(existing: dict, entity: dict) -> bool:
+    return (
+        existing.get("friendly_name") == entity.get("friendly_name")
+        and existing.get("area_id") == entity.get("area_id")
+        and existing.get("area_name") == entity.get("area_name")
+        and json.dumps(existing.get("aliases", [])) == json.dumps(entity.get("aliases", []))
+    )
+
+
 def incremental_sync(mqtt_client: MQTTClient, entity_id: str):
     """Sync a single newly created or changed entity."""
+    incremental_sync_batch(mqtt_client, [entity_id])
+
+
+def incremental_sync_batch(
+    mqtt_client: MQTTClient, entity_ids: list[str], trigger_source: str = "mqtt_entity_created"
+):
+    """
+    Sync a set of newly created or changed entities in one pass: one sync log
+    entry, one HA session (area registry fetched once), one PG lookup of just
+    these rows and one Weaviate round for all of them.
+    """
     start_time = time.time()
 
     # Validate entity_id format
-    if not re.match(r"^[a-zA-Z_]+\.[a-zA-Z0-9_\-]+$", entity_id):
-        publish_warning(
-            mqtt_client,
-            "unknown_event",
-            entity_id=entity_id,
-            message=f"Invalid entity_id format: {entity_id}",
-        )
+    valid_ids = []
+    for entity_id in dict.fromkeys(entity_ids):
+        if not _ENTITY_ID_RE.match(entity_id):
+            publish_warning(
+                mqtt_client,
+                "unknown_event",
+                entity_id=entity_id,
+                message=f"Invalid entity_id format: {entity_id}",
+            )
+        else:
+            valid_ids.append(entity_id)
+    if not valid_ids:
         return
+    label = valid_ids[0] if len(valid_ids) == 1 else f"{len(valid_ids)} entities"
 
     # Concurrent check
     if check_concurrent_sync():
@@ -958,99 +1812,129 @@ def incremental_sync(mqtt_client: MQTTClient, entity_id: str):
             mqtt_client,
             "sync_skipped",
             sync_type="incremental",
-            message=f"Skipped incremental for {entity_id}: another sync running",
+            message=f"Skipped incremental for {label}: another sync running",
         )
         return
 
-    log_id = create_sync_log("incremental", "mqtt_entity_created")
+    log_id = create_sync_log("incremental", trigger_source)
     if log_id is None:
         return
 
-    # Fetch entity from HA
-    entity_data = fetch_single_entity(entity_id)
-    if entity_data is None:
-        error_msg = f"HA API error for {entity_id}"
-        publish_error(mqtt_client, "ha_unreachable", message=error_msg)
-        update_sync_log(log_id, "error", error_message=error_msg)
-        return
+    # Fetch entities from HA
+    fetched, fetch_failed = fetch_entities(valid_ids)
+    fetch_errors = []
+    if fetch_failed:
+        error_msg = f"HA API error for {', '.join(fetch_failed)}"
+        fetch_errors.append(error_msg)
+        publish_error(mqtt_client, "ha_unreachable", message=error_msg[:200])
+        if not fetched:
+            update_sync_log(log_id, "error", error_message=error_msg)
+            return
 
-    if entity_data.get("_skip"):
-        reason = entity_data.get("reason", "not_exposed")
-        logger.info("Incremental sync skipped for %s: %s", entity_id, reason)
+    # Check for no-op (no changes)
+    existing = load_existing_entities(list(fetched))
+    changed = []
+    unchanged = []
+    for entity_id, entity_data in fetched.items():
+        if entity_id in existing and _entity_unchanged(existing[entity_id], entity_data):
+            unchanged.append(entity_id)
+        else:
+            changed.append(entity_data)
+    if unchanged:
+        logger.info("Incremental sync: no change for %s, skipping", ", ".join(unchanged))
+    if not changed:
         update_sync_log(
-            log_id, "success", entities_added=0,
-            details={"skip_reason": reason, "entity_id": entity_id},
+            log_id,
+            "partial" if fetch_errors else "success",
+            entities_added=0,
+            error_message="; ".join(fetch_errors)[:500] if fetch_errors else None,
+            details={"skip_reason": "no_change", "entity_ids": unchanged},
         )
         return
 
-    # Check for no-op (no changes)
-    existing = load_existing_entities()
-    if entity_id in existing:
-        ex = existing[entity_id]
-        no_change = (
-            ex.get("friendly_name") == entity_data.get("friendly_name")
-            and ex.get("area_id") == entity_data.get("area_id")
-            and ex.get("area_name") == entity_data.get("area_name")
-            and json.dumps(ex.get("aliases", [])) == json.dumps(entity_data.get("aliases", []))
-        )
-        if no_change:
-            logger.info("Incremental sync: no change for %s, skipping", entity_id)
-            update_sync_log(
-                log_id, "success", entities_added=0,
-                details={"skip_reason": "no_change", "entity_id": entity_id},
-            )
-            return
-
-    # Load templates for this domain
-    domain = entity_data["domain"]
-    templates = load_templates(domain)
+    # Load templates for the affected domains
+    by_domain: dict[str, list[dict]] = {}
+    for entity_data in changed:
+        by_domain.setdefault(entity_data["domain"], []).append(entity_data)
+    if len(by_domain) == 1:
+        templates = load_templates(next(iter(by_domain)))
+    else:
+        templates = load_templates()
+    if templates is None:
+        error_msg = "Failed to load intent templates from PostgreSQL"
+        publish_error(mqtt_client, "sync_failed", message=error_msg)
+        update_sync_log(log_id, "error", entities_found=len(fetched), error_message=error_msg)
+        return
     template_map = build_template_map(templates)
 
     # Generate utterances
-    utterances = generate_utterances(entity_data, template_map)
-    if not utterances and domain not in template_map:
-        publish_warning(
-            mqtt_client,
-            "no_template",
-            entity_id=entity_id,
-            domain=domain,
-            message=f"No template for domain {domain}",
+    utterances = []
+    for domain, domain_entities in by_domain.items():
+        domain_templates = template_map.get(domain)
+        if domain_templates is None:
+            for entity_data in domain_entities:
+                publish_warning(
+                    mqtt_client,
+                    "no_template",
+                    entity_id=entity_data["entity_id"],
+                    domain=domain,
+                    message=f"No template for domain {domain}",
+                )
+            continue
+        utterances.extend(generate_domain_utterances(domain_entities, domain_templates))
+
+    changed_ids = [e["entity_id"] for e in changed]
+    # Entities of domains without templates keep their Weaviate objects: a
+    # missing domain may only mean the templates are incomplete
+    synced_ids = [e["entity_id"] for e in changed if e["domain"] in template_map]
+    if WEAVIATE_SYNC_MODE == "reconcile":
+        # Only write the utterances that changed for these entities
+        reconciled = weaviate_reconcile(synced_ids, utterances)
+        weaviate_deleted = reconciled["deleted"]
+        weaviate_inserted = reconciled["inserted"] + reconciled["updated"]
+        weaviate_failed = reconciled["failed"]
+        insert_errors = reconciled["errors"]
+    else:
+        # Delete existing Weaviate objects of updated entities
+        weaviate_deleted, _ = weaviate_delete_by_entity(
+            [eid for eid in synced_ids if eid in existing]
         )
 
-    # Delete existing Weaviate objects if updating
-    weaviate_deleted = 0
-    if entity_id in existing:
-        weaviate_deleted, _ = weaviate_delete_by_entity([entity_id])
+        # Insert new utterances
+        weaviate_inserted, weaviate_failed, insert_errors = weaviate_batch_insert(utterances)
 
-    # Insert new utterances
-    weaviate_inserted, weaviate_failed, insert_errors = weaviate_batch_insert(utterances)
-
-    # Upsert entity in PG
-    upsert_entities([entity_data])
+    # Upsert entities in PG
+    upsert_entities(changed)
 
     # Determine status
-    if insert_errors and weaviate_inserted > 0:
+    final_status = _sync_status(insert_errors, weaviate_inserted, weaviate_failed)
+    if final_status == "success" and fetch_errors:
         final_status = "partial"
-    elif insert_errors and weaviate_inserted == 0 and utterances:
-        final_status = "error"
-    else:
-        final_status = "success"
 
     duration_ms = int((time.time() - start_time) * 1000)
+    all_errors = fetch_errors + insert_errors
+    entities_added = sum(1 for eid in changed_ids if eid not in existing)
 
     update_sync_log(
         log_id,
         final_status,
-        entities_added=1 if entity_id not in existing else 0,
-        entities_updated=1 if entity_id in existing else 0,
-        intents_generated=weaviate_inserted,
+        entities_found=len(fetched),
+        entities_added=entities_added,
+        entities_updated=len(changed_ids) - entities_added,
+        intents_generated=len(utterances),
         intents_removed=weaviate_deleted,
-        error_message="; ".join(insert_errors)[:500] if insert_errors else None,
+        error_message="; ".join(all_errors)[:500] if all_errors else None,
+        details={
+            "intents_written": weaviate_inserted,
+            "entity_ids": changed_ids,
+            "unchanged": unchanged,
+            "fetch_failed": fetch_failed,
+        },
     )
 
     logger.info(
         "Incremental sync for %s: status=%s, intents=%d, duration=%dms",
-        entity_id,
+        label,
         final_status,
         weaviate_inserted,
         duration_ms,
@@ -1059,7 +1943,7 @@ def incremental_sync(mqtt_client: MQTTClient, entity_id: str):
 
 def remove_entity(mqtt_client: MQTTClient, entity_id: str):
     """Remove an entity from Weaviate and deactivate in PostgreSQL."""
-    if not re.match(r"^[a-zA-Z_]+\.[a-zA-Z0-9_\-]+$", entity_id):
+    if not _ENTITY_ID_RE.match(entity_id):
         publish_warning(
             mqtt_client,
             "unknown_event",
@@ -1101,8 +1985,7 @@ def remove_entity(mqtt_client: MQTTClient, entity_id: str):
     except Exception as e:
         logger.error("Failed to log entity removal: %s", e)
     finally:
-        if conn:
-            conn.close()
+        release_db_connection(conn)
 
     logger.info("Removed entity %s: %d Weaviate objects deleted", entity_id, deleted)
 
@@ -1110,8 +1993,127 @@ def remove_entity(mqtt_client: MQTTClient, entity_id: str):
 # ---------------------------------------------------------------------------
 # Worker thread
 # ---------------------------------------------------------------------------
+def drain_events(event_queue: queue.Queue, first: dict) -> list[dict]:
+    """Collect further events for up to COALESCE_WINDOW seconds after the first one."""
+    events = [first]
+    deadline = time.monotonic() + COALESCE_WINDOW
+    while len(events) < COALESCE_MAX_EVENTS:
+        remaining = deadline - time.monotonic()
+        try:
+            if remaining > 0:
+                events.append(event_queue.get(timeout=remaining))
+            else:
+                events.append(event_queue.get_nowait())
+        except queue.Empty:
+            break
+    return events
+
+
+def coalesce_events(events: list[dict]) -> list[tuple]:
+    """
+    Merge a burst of events into the actions to run:
+      ("full_sync", trigger, force_all) | ("invalidate_area_cache",) |
+      ("areas", [area_id, ...]) | ("remove", entity_id) |
+      ("incremental", [entity_id, ...]) | ("warning", message)
+
+    - a full sync event supersedes all entity events of the burst (the full
+      sync reads the complete HA state afterwards); several full sync events
+      run once, forced if any of them was templates_updated
+    - area_registry_updated with an area_id drops the area cache and re-syncs
+      only the entities of the changed areas; without area_id it runs a
+      (non-forced) full sync, which picks up renamed areas as changed entities
+    - duplicate entity events are dropped
+    - entity_created followed by entity_removed becomes entity_removed
+      (entity_created may be an update of an existing entity, and removing
+      an entity that was never synced is harmless)
+    - entity_removed followed by entity_created becomes entity_created
+    - all entity_created events are batched into one incremental action
+    """
+    actions: list[tuple] = []
+    full_events: list[str] = []
+    triggers: list[str] = []
+    area_ids: dict[str, None] = {}
+    pending: dict[str, str] = {}  # entity_id -> last effective event (insertion ordered)
+
+    for payload in events:
+        event = payload.get("event", "")
+        if event == "area_registry_updated" and payload.get("area_id"):
+            area_ids[payload["area_id"]] = None
+            continue
+        if event in FULL_SYNC_EVENTS:
+            full_events.append(event)
+            triggers.append(f"{payload.get('source', 'mqtt')}_{event}")
+            continue
+        if event not in ("entity_created", "entity_removed"):
+            actions.append(("warning", f"Unknown event type: {event}"))
+            continue
+
+        entity_id = payload.get("entity_id", "")
+        if not entity_id:
+            actions.append(("warning", f"{event} event missing entity_id"))
+            continue
+
+        previous = pending.get(entity_id)
+        if previous == event:
+            logger.info("Coalesce: duplicate %s for %s dropped", event, entity_id)
+            continue
+        if previous == "entity_created":
+            del pending[entity_id]
+            logger.info("Coalesce: %s created/updated and removed, syncing as removed", entity_id)
+        elif previous == "entity_removed":
+            logger.info("Coalesce: %s removed and re-created, syncing as created", entity_id)
+        pending[entity_id] = event
+
+    if full_events:
+        force_all = "templates_updated" in full_events
+        trigger = triggers[full_events.index("templates_updated")] if force_all else triggers[0]
+        if area_ids or "area_registry_updated" in full_events:
+            actions.append(("invalidate_area_cache",))
+        if area_ids:
+            logger.info("Coalesce: %s supersedes %d area updates", trigger, len(area_ids))
+        if len(full_events) > 1:
+            logger.info("Coalesce: %d full sync events merged into one (%s)", len(full_events), trigger)
+        if pending:
+            logger.info("Coalesce: %s supersedes %d pending entity events", trigger, len(pending))
+        actions.append(("full_sync", trigger, force_all))
+        return actions
+
+    if area_ids:
+        if len(area_ids) > 1:
+            logger.info("Coalesce: %d area updates batched", len(area_ids))
+        actions.append(("areas", list(area_ids)))
+    created = [eid for eid, event in pending.items() if event == "entity_created"]
+    actions.extend(("remove", eid) for eid, event in pending.items() if event == "entity_removed")
+    if created:
+        if len(created) > 1:
+            logger.info("Coalesce: %d entity_created events batched", len(created))
+        actions.append(("incremental", created))
+    return actions
+
+
+def run_action(mqtt_client: MQTTClient, action: tuple):
+    """Execute one action produced by coalesce_events."""
+    kind = action[0]
+    if kind == "full_sync":
+        full_sync(mqtt_client, action[1], force_all=action[2])
+    elif kind == "incremental":
+        incremental_sync_batch(mqtt_client, action[1])
+    elif kind == "remove":
+        remove_entity(mqtt_client, action[1])
+    elif kind == "invalidate_area_cache":
+        invalidate_area_cache()
+    elif kind == "areas":
+        invalidate_area_cache()
+        entity_ids = load_entity_ids_in_areas(action[1])
+        logger.info("Area update %s: re-syncing %d entities", ", ".join(action[1]), len(entity_ids))
+        if entity_ids:
+            incremental_sync_batch(mqtt_client, entity_ids, trigger_source="area_registry_updated")
+    else:
+        publish_warning(mqtt_client, "unknown_event", message=action[1])
+
+
 def worker_loop(event_queue: queue.Queue, mqtt_client: MQTTClient):
-    """Process events from the queue sequentially."""
+    """Process events from the queue, merging bursts (see coalesce_events)."""
     while True:
         try:
             payload = event_queue.get(timeout=HEARTBEAT_INTERVAL)
@@ -1119,61 +2121,45 @@ def worker_loop(event_queue: queue.Queue, mqtt_client: MQTTClient):
             # No event received, just continue (heartbeat is written separately)
             continue
 
-        event = payload.get("event", "")
+        events = drain_events(event_queue, payload)
+        if len(events) > 1:
+            logger.info("Coalescing %d queued events", len(events))
         try:
-            if event in ("ha_start", "templates_updated"):
-                trigger = f"mqtt_{event}"
-                force_all = event == "templates_updated"
-                full_sync(mqtt_client, trigger, force_all=force_all)
-            elif event == "entity_created":
-                entity_id = payload.get("entity_id", "")
-                if entity_id:
-                    incremental_sync(mqtt_client, entity_id)
-                else:
-                    publish_warning(
+            for action in coalesce_events(events):
+                try:
+                    run_action(mqtt_client, action)
+                except Exception as e:
+                    logger.exception("Unhandled error processing action '%s': %s", action[0], e)
+                    publish_error(
                         mqtt_client,
-                        "unknown_event",
-                        message="entity_created event missing entity_id",
+                        "sync_failed",
+                        message=f"Unhandled error: {str(e)[:200]}",
+                        detail=str(e)[:500],
                     )
-            elif event == "entity_removed":
-                entity_id = payload.get("entity_id", "")
-                if entity_id:
-                    remove_entity(mqtt_client, entity_id)
-                else:
-                    publish_warning(
-                        mqtt_client,
-                        "unknown_event",
-                        message="entity_removed event missing entity_id",
-                    )
-            else:
-                publish_warning(
-                    mqtt_client,
-                    "unknown_event",
-                    message=f"Unknown event type: {event}",
-                )
-        except Exception as e:
-            logger.exception("Unhandled error processing event '%s': %s", event, e)
-            publish_error(
-                mqtt_client,
-                "sync_failed",
-                message=f"Unhandled error: {str(e)[:200]}",
-                detail=str(e)[:500],
-            )
         finally:
-            event_queue.task_done()
+            for _ in events:
+                event_queue.task_done()
 
 
 # ---------------------------------------------------------------------------
 # Heartbeat thread
 # ---------------------------------------------------------------------------
 def heartbeat_loop():
-    """Write current timestamp to heartbeat file every HEARTBEAT_INTERVAL seconds."""
+    """
+    Write current timestamp to heartbeat file (and the DB pool metrics to
+    DB_POOL_STATS_FILE) every HEARTBEAT_INTERVAL seconds.
+    """
     while True:
         try:
             with open(HEARTBEAT_FILE, "w") as f:
                 f.write(str(time.time()))
         except Exception as e:
             logger.error("Failed to write heartbeat: %s", e)
+        try:
+            with open(DB_POOL_STATS_FILE, "w") as f:
+                json.dump({"timestamp": _now_iso(), **db_pool_stats()}, f)
+        except Exception as e:
+            logger.error("Failed to write DB pool stats: %s", e)
         time.sleep(HEARTBEAT_INTERVAL)
 
 
@@ -1203,6 +2189,12 @@ def main():
     )
     worker_thread.start()
 
+    # Optional HA WebSocket listener feeding the same queue
+    ws_listener = None
+    if HA_WEBSOCKET_ENABLED:
+        ws_listener = HAWebSocketListener(_ha_websocket_url(), HA_TOKEN, event_queue)
+        ws_listener.start()
+
     logger.info("alice-ha-sync worker ready, waiting for MQTT events on %s", MQTT_SUBSCRIBE_TOPIC)
 
     # Main thread just sleeps; KeyboardInterrupt / SIGTERM will stop the process
@@ -1212,8 +2204,12 @@ def main():
     except KeyboardInterrupt:
         logger.info("Shutting down")
     finally:
+        if ws_listener is not None:
+            ws_listener.stop()
         mqtt_client.client.loop_stop()
         mqtt_client.client.disconnect()
+        reset_weaviate_client()
+        close_db_pool()
 
 
 if __name__ == "__main__":
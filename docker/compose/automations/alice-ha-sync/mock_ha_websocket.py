@@ -0,0 +1,135 @@
+"""
+mock_ha_websocket.py -- Minimal Home Assistant WebSocket API mock for local tests
+
+Speaks the subset of the HA WebSocket protocol used by alice-ha-sync in
+WebSocket mode (HA_WEBSOCKET_ENABLED=true):
+  auth_required -> auth -> auth_ok/auth_invalid, subscribe_events, ping/pong
+and replays a scenario of registry events to every subscribed client.
+
+Usage:
+  pip install -r requirements-dev.txt
+  python mock_ha_websocket.py [--port 8765] [--token TOKEN] [--scenario events.json]
+
+  HA_WEBSOCKET_ENABLED=true HA_WEBSOCKET_URL=ws://localhost:8765 python main.py
+
+A scenario file is a JSON list of steps:
+  [{"delay": 1, "event_type": "entity_registry_updated",
+    "data": {"action": "create", "entity_id": "light.mock_lamp"}}, ...]
+Only the WebSocket side is mocked; REST calls of the worker still go to HA_URL.
+tests/test_ha_websocket.py runs HAWebSocketListener against it (python -m pytest tests).
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] mock-ha-ws: %(message)s",
+)
+logger = logging.getLogger("mock-ha-ws")
+
+DEMO_SCENARIO = [
+    {"delay": 1, "event_type": "entity_registry_updated",
+     "data": {"action": "create", "entity_id": "light.mock_lamp"}},
+    {"delay": 1, "event_type": "entity_registry_updated",
+     "data": {"action": "update", "entity_id": "light.mock_lamp", "changes": {"name": None}}},
+    {"delay": 1, "event_type": "entity_registry_updated",
+     "data": {"action": "update", "entity_id": "light.mock_lamp", "changes": {"icon": None}}},
+    {"delay": 1, "event_type": "entity_registry_updated",
+     "data": {"action": "update", "entity_id": "light.mock_lamp_renamed",
+              "old_entity_id": "light.mock_lamp", "changes": {"entity_id": "light.mock_lamp"}}},
+    {"delay": 1, "event_type": "area_registry_updated",
+     "data": {"action": "update", "area_id": "wohnzimmer"}},
+    {"delay": 1, "event_type": "entity_registry_updated",
+     "data": {"action": "remove", "entity_id": "light.mock_lamp_renamed"}},
+]
+
+
+async def handle_client(ws, token: str | None, scenario: list[dict]):
+    await ws.send(json.dumps({"type": "auth_required", "ha_version": "mock"}))
+    auth = json.loads(await ws.recv())
+    if auth.get("type") != "auth" or (token and auth.get("access_token") != token):
+        await ws.send(json.dumps({"type": "auth_invalid", "message": "Invalid access token"}))
+        return
+    await ws.send(json.dumps({"type": "auth_ok", "ha_version": "mock"}))
+
+    subscriptions: dict[str, int] = {}  # event_type -> subscription id
+    replay = None
+
+    async def play():
+        for step in scenario:
+            await asyncio.sleep(step.get("delay", 1))
+            sub_id = subscriptions.get(step["event_type"])
+            if sub_id is None:
+                continue
+            logger.info("-> %s %s", step["event_type"], step["data"])
+            await ws.send(json.dumps({
+                "id": sub_id,
+                "type": "event",
+                "event": {
+                    "event_type": step["event_type"],
+                    "data": step["data"],
+                    "origin": "LOCAL",
+                    "time_fired": datetime.now(timezone.utc).isoformat(),
+                },
+            }))
+        logger.info("Scenario finished")
+
+    try:
+        async for raw in ws:
+            msg = json.loads(raw)
+            if msg.get("type") == "subscribe_events":
+                subscriptions[msg.get("event_type", "*")] = msg["id"]
+                await ws.send(json.dumps({"id": msg["id"], "type": "result", "success": True, "result": None}))
+                logger.info("Client subscribed to %s", msg.get("event_type"))
+                if replay is None:
+                    replay = asyncio.create_task(play())
+            elif msg.get("type") == "ping":
+                await ws.send(json.dumps({"id": msg["id"], "type": "pong"}))
+            else:
+                await ws.send(json.dumps({
+                    "id": msg.get("id"),
+                    "type": "result",
+                    "success": False,
+                    "error": {"code": "unknown_command", "message": "Unknown command."},
+                }))
+    finally:
+        if replay is not None:
+            replay.cancel()
+
+
+async def serve(host: str, port: int, token: str | None, scenario: list[dict]):
+    try:
+        import websockets
+    except ImportError:
+        raise SystemExit("mock_ha_websocket.py needs the 'websockets' package (pip install -r requirements-dev.txt)")
+
+    async with websockets.serve(lambda ws: handle_client(ws, token, scenario), host, port):
+        logger.info("Mock HA WebSocket listening on ws://%s:%d (%d scenario steps)", host, port, len(scenario))
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Home Assistant WebSocket API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--token", help="accepted access token (default: accept any)")
+    parser.add_argument("--scenario", help="JSON file with event steps (default: built-in demo)")
+    args = parser.parse_args()
+
+    scenario = DEMO_SCENARIO
+    if args.scenario:
+        with open(args.scenario) as f:
+            scenario = json.load(f)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.token, scenario))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
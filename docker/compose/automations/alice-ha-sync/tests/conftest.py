@@ -0,0 +1,17 @@
+import os
+import sys
+from pathlib import Path
+
+# main.py validates its required configuration at import time
+for _name, _value in {
+    "HA_URL": "http://localhost:8123",
+    "HA_TOKEN": "test-token",
+    "MQTT_URL": "mqtt://localhost:1883",
+    "MQTT_USER": "test",
+    "MQTT_PASSWORD": "test",
+    "POSTGRES_CONNECTION": "postgresql://localhost/test",
+    "WEAVIATE_URL": "http://localhost:8080",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
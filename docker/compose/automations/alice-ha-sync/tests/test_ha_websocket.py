@@ -0,0 +1,116 @@
+"""HAWebSocketListener against mock_ha_websocket.py (pip install -r requirements-dev.txt)."""
+
+import asyncio
+import queue
+import threading
+
+import pytest
+
+websockets = pytest.importorskip("websockets")
+
+import main  # noqa: E402
+import mock_ha_websocket  # noqa: E402
+
+TOKEN = "test-token"
+
+# DEMO_SCENARIO without the one-second pauses between steps
+SCENARIO = [{**step, "delay": 0.05} for step in mock_ha_websocket.DEMO_SCENARIO]
+
+EXPECTED_PAYLOADS = [
+    # create
+    {"event": "entity_created", "entity_id": "light.mock_lamp", "source": "websocket"},
+    # name update
+    {"event": "entity_created", "entity_id": "light.mock_lamp", "source": "websocket"},
+    # icon update is not relevant and dropped; rename = remove old + create new
+    {"event": "entity_removed", "entity_id": "light.mock_lamp", "source": "websocket"},
+    {"event": "entity_created", "entity_id": "light.mock_lamp_renamed", "source": "websocket"},
+    {"event": "area_registry_updated", "action": "update", "area_id": "wohnzimmer", "source": "websocket"},
+    {"event": "entity_removed", "entity_id": "light.mock_lamp_renamed", "source": "websocket"},
+]
+
+
+class MockServer:
+    """mock_ha_websocket on a free local port, served from a background event loop."""
+
+    def __init__(self, token: str | None):
+        self.token = token
+        self.connections = []
+        self.port = None
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._stopped = None
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(self._serve(),), daemon=True)
+
+    async def _handler(self, ws):
+        self.connections.append(ws)
+        await mock_ha_websocket.handle_client(ws, self.token, SCENARIO)
+
+    async def _serve(self):
+        self._stopped = asyncio.Event()
+        async with websockets.serve(self._handler, "127.0.0.1", 0) as server:
+            self.port = next(iter(server.sockets)).getsockname()[1]
+            self._ready.set()
+            await self._stopped.wait()
+
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}"
+
+    def start(self):
+        self._thread.start()
+        assert self._ready.wait(5), "mock server did not start"
+
+    def drop_connections(self):
+        """Cut every client connection without a close handshake, like a network loss."""
+        for ws in list(self.connections):
+            self._loop.call_soon_threadsafe(ws.transport.abort)
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._stopped.set)
+        self._thread.join(5)
+        self._loop.close()
+
+
+@pytest.fixture
+def mock_server():
+    server = MockServer(TOKEN)
+    server.start()
+    yield server
+    server.stop()
+
+
+def _drain(event_queue: queue.Queue, count: int, timeout: float = 5) -> list[dict]:
+    return [event_queue.get(timeout=timeout) for _ in range(count)]
+
+
+def test_translate_demo_scenario():
+    payloads = [
+        payload
+        for step in mock_ha_websocket.DEMO_SCENARIO
+        for payload in main.translate_ha_event(step["event_type"], step["data"])
+    ]
+    assert payloads == EXPECTED_PAYLOADS
+
+
+def test_listener_queues_scenario_and_reconnects(mock_server):
+    event_queue = queue.Queue()
+    listener = main.HAWebSocketListener(mock_server.url, TOKEN, event_queue)
+    listener.start()
+    try:
+        assert _drain(event_queue, len(EXPECTED_PAYLOADS)) == EXPECTED_PAYLOADS
+
+        # Events may have been missed while disconnected: a full sync is queued
+        mock_server.drop_connections()
+        assert event_queue.get(timeout=10) == {"event": "websocket_reconnected", "source": "websocket"}
+        assert _drain(event_queue, len(EXPECTED_PAYLOADS)) == EXPECTED_PAYLOADS
+    finally:
+        listener.stop()
+
+
+def test_listener_rejects_invalid_token(mock_server):
+    listener = main.HAWebSocketListener(mock_server.url, "wrong-token", queue.Queue())
+    try:
+        with pytest.raises(PermissionError):
+            listener._connect()
+    finally:
+        listener.stop()
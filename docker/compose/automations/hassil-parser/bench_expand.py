@@ -0,0 +1,485 @@
+"""
+Offline benchmark for expand_ha_intents.
+
+Runs parse_intent_yaml() over a pinned snapshot of one language's sentence
+YAMLs on both engines (hassil and custom) and writes a JSON report with, per
+domain and engine: wall time, peak memory, pattern counts, expansion budget
+violations and the expanded patterns, plus the patterns that differ between
+the two engines. A report can be compared against a stored baseline.
+
+Apart from pinning, no network access is needed; the snapshot is a directory
+of YAML files or an intents archive ZIP (e.g. the service's cached
+/cache/intents-main.zip).
+
+bench/snapshot-de/ is where `pin` writes and the default --snapshot: German
+sentence files from the upstream intents archive, committed together with
+their SNAPSHOT.json (archive URL, sha256, ETag and pin date). Record the baseline report
+(bench/baseline-de.json) on the same host the comparison runs on.
+
+Dev tool, not part of the service image: run it from this source directory
+after `pip install -r requirements.txt` (hassil is needed for its engine).
+
+Usage:
+  # Download the upstream archive and pin its German sentences (a few
+  # domains keep the snapshot small enough to commit)
+  python bench_expand.py pin --download --domain light --domain cover --domain climate
+
+  # Record a baseline, later compare a run against it
+  python bench_expand.py run --out bench/baseline-de.json
+  python bench_expand.py run --out /tmp/bench-report.json --baseline bench/baseline-de.json
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import yaml
+
+import expand_ha_intents
+from expand_ha_intents import (
+    MAX_PATTERNS,
+    PATTERN_SAMPLING,
+    merge_common_rules,
+    parse_intent_yaml,
+    prepare_domain_yaml,
+)
+
+logger = logging.getLogger("bench-expand")
+
+SENTENCES_ROOT = "intents-main/sentences/"
+SNAPSHOT_META_FILE = "SNAPSHOT.json"
+DEFAULT_SNAPSHOT = Path(__file__).resolve().parent / "bench" / "snapshot-de"
+# The archive main.py syncs from (HA_INTENTS_ZIP_URL)
+INTENTS_ZIP_URL = "https://github.com/OHF-Voice/intents/archive/refs/heads/main.zip"
+ENGINES = ("hassil", "custom")
+# Minimum duration of one timed sample; short domains are expanded in a loop
+MIN_SAMPLE_MS = 50.0
+MAX_SAMPLE_LOOPS = 10_000
+
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+# ---------------------------------------------------------------------------
+# Snapshot handling
+# ---------------------------------------------------------------------------
+def _read_archive_entries(archive: Path, language: str) -> dict[str, bytes]:
+    """Raw sentences/<language>/*.yaml entries of an intents archive, by file name."""
+    prefix = f"{SENTENCES_ROOT}{language}/"
+    entries: dict[str, bytes] = {}
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            folder, _, filename = info.filename.rpartition("/")
+            if folder + "/" == prefix and filename.endswith(".yaml"):
+                entries[filename] = zf.read(info)
+    return entries
+
+
+def _read_snapshot(snapshot: Path, language: str) -> dict[str, bytes]:
+    """Raw YAML files of a snapshot directory or archive, by file name."""
+    if snapshot.is_dir():
+        return {path.name: path.read_bytes() for path in sorted(snapshot.glob("*.yaml"))}
+    return _read_archive_entries(snapshot, language)
+
+
+def _snapshot_hash(entries: dict[str, bytes]) -> str:
+    digest = hashlib.sha256()
+    for name in sorted(entries):
+        digest.update(name.encode("utf-8") + b"\0")
+        digest.update(hashlib.sha256(entries[name]).digest())
+    return digest.hexdigest()
+
+
+def download_archive(url: str, archive: Path) -> dict:
+    """Download an intents archive, with the same metadata main.py keeps next to its cached copy."""
+    import httpx
+
+    logger.info("Downloading intents archive from %s", url)
+    archive.parent.mkdir(parents=True, exist_ok=True)
+    with httpx.Client(timeout=60.0, follow_redirects=True) as client:
+        with client.stream("GET", url) as response:
+            response.raise_for_status()
+            with archive.open("wb") as f:
+                for chunk in response.iter_bytes(256 * 1024):
+                    f.write(chunk)
+                size = f.tell()
+
+    meta = {
+        "url": url,
+        "etag": response.headers.get("etag"),
+        "last_modified": response.headers.get("last-modified"),
+        "size": size,
+        "downloaded_at": datetime.now(timezone.utc).isoformat(),
+    }
+    archive.with_suffix(".json").write_text(json.dumps(meta))
+    return meta
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def pin_snapshot(archive: Path, language: str, out: Path, domains: list[str]) -> dict:
+    """
+    Copy one language's sentence YAMLs out of an archive into a snapshot
+    directory. With domains, only the files of those HA domains
+    (<domain>_<Intent>.yaml) plus the shared _*.yaml files are kept.
+    """
+    entries = _read_archive_entries(archive, language)
+    if domains:
+        entries = {
+            name: raw
+            for name, raw in entries.items()
+            if name.startswith("_") or any(name.startswith(f"{d}_") for d in domains)
+        }
+    if not entries:
+        raise SystemExit(f"No {SENTENCES_ROOT}{language}/*.yaml entries in {archive}")
+
+    out.mkdir(parents=True, exist_ok=True)
+    for stale in out.glob("*.yaml"):
+        stale.unlink()
+    for name, raw in entries.items():
+        (out / name).write_bytes(raw)
+
+    archive_meta: dict = {}
+    meta_path = archive.with_suffix(".json")
+    if meta_path.is_file():
+        archive_meta = json.loads(meta_path.read_text())
+
+    meta = {
+        "language": language,
+        "domains": sorted(domains) or None,
+        "files": len(entries),
+        "snapshot_hash": _snapshot_hash(entries),
+        "archive_url": archive_meta.get("url"),
+        "archive_sha256": _file_sha256(archive),
+        "archive_etag": archive_meta.get("etag"),
+        "archive_downloaded_at": archive_meta.get("downloaded_at"),
+        "pinned_at": datetime.now(timezone.utc).isoformat(),
+    }
+    (out / SNAPSHOT_META_FILE).write_text(json.dumps(meta, indent=2))
+    logger.info("Pinned %d %s YAML files to %s", len(entries), language, out)
+    return meta
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+def _clear_caches() -> None:
+    """Drop the custom engine's parse caches so every run starts cold."""
+    expand_ha_intents._parse_template.cache_clear()
+    expand_ha_intents._parse_rule.cache_clear()
+
+
+def _time_loops(engine: str, domain: str, yaml_data: dict, max_patterns: int, loops: int) -> float:
+    """Wall time in ms of loops cold expansions of one domain."""
+    elapsed = 0.0
+    for _ in range(loops):
+        _clear_caches()
+        started = time.perf_counter()
+        parse_intent_yaml(yaml_data, domain, max_patterns, engine=engine)
+        elapsed += time.perf_counter() - started
+    return elapsed * 1000
+
+
+def _run_engine(engine: str, domain: str, yaml_data: dict, max_patterns: int, repeat: int) -> dict:
+    """
+    Expand one domain with one engine, then measure peak memory. Each timed
+    sample repeats the cold expansion until it lasts MIN_SAMPLE_MS, so that
+    sub-millisecond domains are not timer noise; time_ms is the best
+    per-expansion time over repeat samples.
+    """
+    loops = 1
+    sample = _time_loops(engine, domain, yaml_data, max_patterns, loops)
+    while sample < MIN_SAMPLE_MS and loops < MAX_SAMPLE_LOOPS:
+        loops = min(MAX_SAMPLE_LOOPS, max(loops * 2, math.ceil(loops * MIN_SAMPLE_MS / max(sample, 0.001))))
+        sample = _time_loops(engine, domain, yaml_data, max_patterns, loops)
+    timings = [sample / loops]
+    for _ in range(repeat - 1):
+        timings.append(_time_loops(engine, domain, yaml_data, max_patterns, loops) / loops)
+
+    _clear_caches()
+    diagnostics: list[dict] = []
+    tracemalloc.start()
+    try:
+        templates = parse_intent_yaml(yaml_data, domain, max_patterns, diagnostics, engine=engine)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    patterns = {tmpl["intent"]: tmpl["patterns"] for tmpl in templates}
+    return {
+        "time_ms": round(min(timings), 4),
+        "time_ms_median": round(statistics.median(timings), 4),
+        "loops": loops,
+        "peak_kib": round(peak / 1024, 1),
+        "intents": len(patterns),
+        "patterns_total": sum(len(p) for p in patterns.values()),
+        "budget_exceeded": diagnostics,
+        "patterns": patterns,
+    }
+
+
+def _engine_diff(hassil: dict, custom: dict) -> dict:
+    """Per intent: patterns produced by only one of the engines."""
+    diff: dict = {}
+    for intent in sorted(set(hassil["patterns"]) | set(custom["patterns"])):
+        only_hassil = set(hassil["patterns"].get(intent, [])) - set(custom["patterns"].get(intent, []))
+        only_custom = set(custom["patterns"].get(intent, [])) - set(hassil["patterns"].get(intent, []))
+        if only_hassil or only_custom:
+            diff[intent] = {"only_hassil": sorted(only_hassil), "only_custom": sorted(only_custom)}
+    return diff
+
+
+def run_benchmark(snapshot: Path, language: str, max_patterns: int, repeat: int, domains: list[str]) -> dict:
+    if not snapshot.exists():
+        raise SystemExit(f"Snapshot {snapshot} does not exist; pin one first (see `bench_expand.py pin --help`)")
+    entries = _read_snapshot(snapshot, language)
+    if not entries:
+        raise SystemExit(f"No YAML files found in snapshot {snapshot}")
+
+    domain_yamls: dict[str, dict] = {}
+    for name, raw in entries.items():
+        parsed = yaml.load(raw.decode("utf-8"), Loader=_YAML_LOADER)
+        if parsed and isinstance(parsed, dict):
+            domain_yamls[Path(name).stem] = parsed
+    shared_rules = merge_common_rules(domain_yamls)
+
+    engines = [e for e in ENGINES if e != "hassil" or expand_ha_intents.hassil_available()]
+    if "hassil" not in engines:
+        logger.warning("hassil library not available, benchmarking the custom engine only")
+
+    selected = sorted(d for d in domain_yamls if not d.startswith("_") and (not domains or d in domains))
+    results: dict[str, dict] = {}
+    for domain in selected:
+        yaml_data = prepare_domain_yaml(domain_yamls[domain], shared_rules, language)
+        results[domain] = {}
+        for engine in engines:
+            results[domain][engine] = _run_engine(engine, domain, yaml_data, max_patterns, repeat)
+        if len(engines) == len(ENGINES):
+            results[domain]["diff"] = _engine_diff(results[domain]["hassil"], results[domain]["custom"])
+        logger.info(
+            "%-24s %s",
+            domain,
+            "  ".join(
+                f"{e}: {results[domain][e]['time_ms']:8.1f} ms {results[domain][e]['patterns_total']:5d} patterns"
+                for e in engines
+            ),
+        )
+
+    totals = {
+        engine: {
+            "time_ms": round(sum(r[engine]["time_ms"] for r in results.values()), 3),
+            "peak_kib_max": max((r[engine]["peak_kib"] for r in results.values()), default=0),
+            "intents": sum(r[engine]["intents"] for r in results.values()),
+            "patterns_total": sum(r[engine]["patterns_total"] for r in results.values()),
+            "budget_exceeded": sum(len(r[engine]["budget_exceeded"]) for r in results.values()),
+        }
+        for engine in engines
+    }
+    if len(engines) == len(ENGINES):
+        totals["differing_intents"] = sum(len(r["diff"]) for r in results.values())
+
+    snapshot_meta: dict = {}
+    if snapshot.is_dir() and (snapshot / SNAPSHOT_META_FILE).is_file():
+        snapshot_meta = json.loads((snapshot / SNAPSHOT_META_FILE).read_text())
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "snapshot": str(snapshot),
+            "snapshot_hash": _snapshot_hash(entries),
+            "snapshot_meta": snapshot_meta,
+            "language": language,
+            "engines": engines,
+            "max_patterns": max_patterns,
+            "sampling": PATTERN_SAMPLING,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "hassil": _hassil_version(),
+        },
+        "totals": totals,
+        "domains": results,
+    }
+
+
+def _hassil_version() -> str | None:
+    try:
+        from importlib.metadata import version
+
+        return version("hassil")
+    except Exception:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Baseline comparison
+# ---------------------------------------------------------------------------
+def _regression_reasons(cur: dict, prev: dict, threshold: float, time_floor_ms: float, peak_floor_kib: float) -> list[str]:
+    """Time/peak growth beyond threshold that is also larger than the absolute floor."""
+    reasons = []
+    if prev["time_ms"] and cur["time_ms"] > max(prev["time_ms"] * threshold, prev["time_ms"] + time_floor_ms):
+        reasons.append(f"time x{round(cur['time_ms'] / prev['time_ms'], 3)}")
+    if prev["peak_kib"] and cur["peak_kib"] > max(prev["peak_kib"] * threshold, prev["peak_kib"] + peak_floor_kib):
+        reasons.append(f"peak memory x{round(cur['peak_kib'] / prev['peak_kib'], 3)}")
+    return reasons
+
+
+def compare_reports(
+    report: dict, baseline: dict, threshold: float, time_floor_ms: float, peak_floor_kib: float
+) -> dict:
+    """
+    Compare a report against a baseline report. A domain/engine (or an
+    engine's totals) regresses if its time or peak memory grew by more than
+    threshold (ratio, e.g. 1.2) and by more than the absolute floor, or if it
+    lost patterns. Pattern output changes are listed per intent; they are
+    only meaningful when both reports used the same snapshot.
+    """
+    same_snapshot = report["meta"]["snapshot_hash"] == baseline["meta"]["snapshot_hash"]
+    comparison: dict = {
+        "baseline_created_at": baseline["meta"]["created_at"],
+        "same_snapshot": same_snapshot,
+        "threshold": threshold,
+        "time_floor_ms": time_floor_ms,
+        "peak_floor_kib": peak_floor_kib,
+        "regressions": [],
+        "totals": {},
+        "domains": {},
+    }
+
+    for engine in report["meta"]["engines"]:
+        cur, prev = report["totals"][engine], baseline["totals"].get(engine)
+        if prev is None:
+            continue
+        comparison["totals"][engine] = {
+            "time_ratio": round(cur["time_ms"] / prev["time_ms"], 3) if prev["time_ms"] else None,
+            "patterns_delta": cur["patterns_total"] - prev["patterns_total"],
+        }
+        reasons = _regression_reasons(
+            {"time_ms": cur["time_ms"], "peak_kib": cur["peak_kib_max"]},
+            {"time_ms": prev["time_ms"], "peak_kib": prev["peak_kib_max"]},
+            threshold,
+            time_floor_ms,
+            peak_floor_kib,
+        )
+        if reasons:
+            comparison["regressions"].append({"domain": "(total)", "engine": engine, "reasons": reasons})
+
+    for domain, current in report["domains"].items():
+        previous = baseline["domains"].get(domain)
+        if previous is None:
+            continue
+        for engine in report["meta"]["engines"]:
+            if engine not in previous:
+                continue
+            cur, prev = current[engine], previous[engine]
+            entry = {
+                "time_ratio": round(cur["time_ms"] / prev["time_ms"], 3) if prev["time_ms"] else None,
+                "peak_ratio": round(cur["peak_kib"] / prev["peak_kib"], 3) if prev["peak_kib"] else None,
+                "patterns_delta": cur["patterns_total"] - prev["patterns_total"],
+            }
+            if same_snapshot:
+                entry["changed_intents"] = sorted(
+                    intent
+                    for intent in set(cur["patterns"]) | set(prev["patterns"])
+                    if cur["patterns"].get(intent) != prev["patterns"].get(intent)
+                )
+            comparison["domains"].setdefault(domain, {})[engine] = entry
+
+            reasons = _regression_reasons(cur, prev, threshold, time_floor_ms, peak_floor_kib)
+            if same_snapshot and entry["patterns_delta"] < 0:
+                reasons.append(f"{entry['patterns_delta']} patterns")
+            if reasons:
+                comparison["regressions"].append({"domain": domain, "engine": engine, "reasons": reasons})
+
+    return comparison
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every expanded intent")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    pin = sub.add_parser("pin", help="pin one language of an intents archive as a snapshot directory")
+    pin.add_argument("--archive", type=Path, default=Path("/tmp/intents-main.zip"), help="intents archive ZIP")
+    pin.add_argument("--download", action="store_true", help="download the archive to --archive first")
+    pin.add_argument("--url", default=INTENTS_ZIP_URL, help="archive URL for --download")
+    pin.add_argument("--language", default="de")
+    pin.add_argument("--domain", action="append", default=[], help="only pin these HA domains")
+    pin.add_argument("--out", type=Path, default=DEFAULT_SNAPSHOT)
+
+    run = sub.add_parser("run", help="benchmark both engines on a snapshot")
+    run.add_argument(
+        "--snapshot", type=Path, default=DEFAULT_SNAPSHOT, help="snapshot directory or intents archive"
+    )
+    run.add_argument("--language", default="de", help="language to read from an archive snapshot")
+    run.add_argument("--out", type=Path, required=True, help="JSON report to write")
+    run.add_argument("--baseline", type=Path, help="JSON report to compare against")
+    run.add_argument("--max-patterns", type=int, default=MAX_PATTERNS)
+    run.add_argument("--repeat", type=int, default=5, help="timed samples per domain and engine (best)")
+    run.add_argument("--domain", action="append", default=[], help="only benchmark these domains")
+    run.add_argument("--threshold", type=float, default=1.2, help="regression ratio for time/memory")
+    run.add_argument("--time-floor-ms", type=float, default=5.0, help="minimum time growth counted as regression")
+    run.add_argument(
+        "--peak-floor-kib", type=float, default=256.0, help="minimum peak memory growth counted as regression"
+    )
+    run.add_argument("--fail-on-regression", action="store_true", help="exit 1 on regressions")
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    logging.getLogger("expand_ha_intents").setLevel(logging.INFO if args.verbose else logging.ERROR)
+
+    if args.command == "pin":
+        if args.download:
+            download_archive(args.url, args.archive)
+        print(json.dumps(pin_snapshot(args.archive, args.language, args.out, args.domain), indent=2))
+        return 0
+
+    report = run_benchmark(args.snapshot, args.language, args.max_patterns, args.repeat, args.domain)
+    if args.baseline:
+        report["comparison"] = compare_reports(
+            report,
+            json.loads(args.baseline.read_text()),
+            args.threshold,
+            args.time_floor_ms,
+            args.peak_floor_kib,
+        )
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    logger.info("Wrote report to %s", args.out)
+    print(json.dumps(report["totals"], indent=2))
+
+    comparison = report.get("comparison")
+    if comparison:
+        for regression in comparison["regressions"]:
+            logger.warning(
+                "Regression in %s [%s]: %s",
+                regression["domain"],
+                regression["engine"],
+                ", ".join(regression["reasons"]),
+            )
+        if comparison["regressions"] and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
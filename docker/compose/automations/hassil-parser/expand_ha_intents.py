@@ -3,16 +3,26 @@ Hassil template expansion for Home Assistant intent sentences.
 
 Supports two expansion engines:
   1. hassil library (preferred) — official HA parser, activated when hassil is importable
-  2. Custom regex fallback — handles [optional], (alt1|alt2), <rule>, {slot}
+  2. Custom fallback engine — parses [optional], (alt1|alt2), <rule>, {slot} into
+     a cached AST and enumerates patterns lazily
 
 Hard cap: MAX_PATTERNS_PER_INTENT patterns per intent (default 50).
+Per-intent budget: EXPANSION_CANDIDATE_BUDGET generated candidates and
+EXPANSION_TIME_BUDGET_MS wall time; intents hitting it are reported as diagnostics.
+Sampling: PATTERN_SAMPLING=first keeps the first patterns in enumeration order,
+PATTERN_SAMPLING=diverse picks a maximally diverse subset from a larger pool.
 """
 
+import functools
+import heapq
 import itertools
 import logging
 import os
+import random
 import re
-from typing import Optional
+import time
+import zlib
+from typing import Iterator, NamedTuple, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -76,78 +86,412 @@ def _intent_to_service(intent_name: str, domain: str) -> str:
     return f"{domain}.{action}"
 
 MAX_PATTERNS = int(os.environ.get("MAX_PATTERNS_PER_INTENT", "50"))
+EXPANSION_CANDIDATE_BUDGET = int(os.environ.get("EXPANSION_CANDIDATE_BUDGET", "20000"))
+EXPANSION_TIME_BUDGET_MS = int(os.environ.get("EXPANSION_TIME_BUDGET_MS", "2000"))
+# "first" = first N patterns in enumeration order, "diverse" = coverage-based subset
+PATTERN_SAMPLING = os.environ.get("PATTERN_SAMPLING", "first").strip().lower()
+# Candidate pool for diverse sampling: max_patterns * SAMPLING_POOL_FACTOR per intent
+SAMPLING_POOL_FACTOR = int(os.environ.get("SAMPLING_POOL_FACTOR", "20"))
+
+if PATTERN_SAMPLING not in ("first", "diverse"):
+    logger.warning("Unknown PATTERN_SAMPLING=%r, using 'first'", PATTERN_SAMPLING)
+    PATTERN_SAMPLING = "first"
+
 
 # ---------------------------------------------------------------------------
-# Try to use the official hassil library; fall back to custom implementation
+# Per-intent expansion budget (guards against combinatorial explosion)
 # ---------------------------------------------------------------------------
-_USE_HASSIL = False
-try:
-    from hassil.intents import Intents
-    from hassil.sample import sample_sentence
+class ExpansionBudgetExceeded(Exception):
+    """Raised from inside enumeration when an intent's budget is used up."""
+
+
+class ExpansionBudget:
+    """
+    Limits the number of generated candidates (before dedup) and the wall time
+    spent expanding one intent. tick() is called for every candidate produced
+    by either engine and raises ExpansionBudgetExceeded once a limit is hit;
+    the first violation is kept in self.exceeded for diagnostics.
+
+    start_template() gives the next template an equal share of what is left,
+    so one pathological template cannot starve the intent's later sentences;
+    unused shares carry over to the templates after it.
+    """
+
+    def __init__(
+        self,
+        max_candidates: int = EXPANSION_CANDIDATE_BUDGET,
+        max_ms: int = EXPANSION_TIME_BUDGET_MS,
+    ):
+        self.max_candidates = max_candidates
+        self.max_ms = max_ms
+        self.candidates = 0
+        self.started = time.monotonic()
+        self.deadline = self.started + max_ms / 1000
+        self.template_limit: int | None = None
+        self.template_deadline: float | None = None
+        self.exceeded: dict | None = None
+
+    @property
+    def exhausted(self) -> bool:
+        """True once the intent-wide budget is used up."""
+        return self.candidates >= self.max_candidates or time.monotonic() > self.deadline
+
+    def start_template(self, remaining_templates: int) -> None:
+        """Limit the next template to 1/remaining_templates of the budget left."""
+        now = time.monotonic()
+        remaining_templates = max(remaining_templates, 1)
+        left = max(self.max_candidates - self.candidates, 0)
+        self.template_limit = self.candidates + max(left // remaining_templates, 1)
+        self.template_deadline = now + max(self.deadline - now, 0) / remaining_templates
+
+    def tick(self) -> None:
+        self.candidates += 1
+        if self.candidates > self.max_candidates:
+            self._exceed("candidates", "intent")
+        if time.monotonic() > self.deadline:
+            self._exceed("time", "intent")
+        if self.template_limit is not None and self.candidates > self.template_limit:
+            self._exceed("candidates", "template")
+        if self.template_deadline is not None and time.monotonic() > self.template_deadline:
+            self._exceed("time", "template")
+
+    def _exceed(self, reason: str, scope: str) -> None:
+        if self.exceeded is None:
+            self.exceeded = {
+                "reason": reason,
+                "scope": scope,
+                "candidates": self.candidates,
+                "elapsed_ms": int((time.monotonic() - self.started) * 1000),
+            }
+        raise ExpansionBudgetExceeded(reason)
+
+    def diagnostic(self, domain: str, intent: str, patterns: int) -> dict:
+        """Describe the budget violation for the /intents/sync response."""
+        exceeded = self.exceeded or {}
+        return {
+            "domain": domain,
+            "intent": intent,
+            "template": exceeded.get("template", "")[:200],
+            "reason": exceeded.get("reason"),
+            "scope": exceeded.get("scope"),
+            "candidates": exceeded.get("candidates", self.candidates),
+            "elapsed_ms": exceeded.get("elapsed_ms", 0),
+            "patterns": patterns,
+        }
+
+# ---------------------------------------------------------------------------
+# Use the official hassil library when installed; fall back to custom
+# implementation. hassil is imported on first use, not at module import, so
+# importing this module (and starting the web service) stays fast.
+# ---------------------------------------------------------------------------
+_hassil_api: tuple | None = None
+
+
+def _hassil():
+    """Import hassil once; returns (Intents, sample_sentence) or () if unavailable."""
+    global _hassil_api
+    if _hassil_api is None:
+        try:
+            from hassil.intents import Intents
+            from hassil.sample import sample_sentence
+
+            _hassil_api = (Intents, sample_sentence)
+            logger.info("Using hassil library for template expansion")
+        except ImportError:
+            _hassil_api = ()
+            logger.info("hassil library not available, using custom template expansion")
+    return _hassil_api
 
-    _USE_HASSIL = True
-    logger.info("Using hassil library for template expansion")
-except ImportError:
-    logger.info("hassil library not available, using custom regex expansion")
+
+def hassil_available() -> bool:
+    """Whether the hassil engine can be used (imports hassil on first call)."""
+    return bool(_hassil())
+
+
+def expansion_engine() -> str:
+    """
+    Default engine with its version, e.g. "hassil-3.12.1" or "custom", read
+    from the installed package metadata without importing hassil.
+    """
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return f"hassil-{version('hassil')}"
+    except PackageNotFoundError:
+        return "custom"
 
 
 # ===================================================================
 # Custom expansion implementation (fallback)
+#
+# Templates are parsed once into a small AST and patterns are enumerated
+# lazily, so expansion stops as soon as max_patterns unique patterns have
+# been produced instead of materialising every combination first.
 # ===================================================================
 
 
-def _resolve_rules(template: str, expansion_rules: dict[str, list[str]]) -> list[str]:
-    """Replace <rule> references with their expansions recursively."""
-    match = re.search(r"<(\w+)>", template)
-    if not match:
-        return [template]
+class _Text(NamedTuple):
+    """Literal text (slot placeholders like {name} are kept as literal text)."""
 
-    rule_name = match.group(1)
-    replacements = expansion_rules.get(rule_name, [])
-    if not replacements:
-        logger.warning("Expansion rule <%s> not found, removing from template", rule_name)
-        replacements = [""]
+    text: str
 
-    results: list[str] = []
-    for replacement in replacements:
-        expanded = template[: match.start()] + replacement + template[match.end() :]
-        # Recurse to resolve further <rule> references in the result
-        results.extend(_resolve_rules(expanded, expansion_rules))
-    return results
 
+class _Seq(NamedTuple):
+    """Concatenation of child nodes."""
 
-def _expand_optionals(template: str) -> list[str]:
-    """Expand [optional] into two variants: with and without the content."""
-    match = re.search(r"\[([^\[\]]*)\]", template)
-    if not match:
-        return [template]
+    items: tuple
 
-    prefix = template[: match.start()]
-    suffix = template[match.end() :]
-    content = match.group(1)
 
-    results: list[str] = []
-    # Variant with the optional content
-    results.extend(_expand_optionals(prefix + content + suffix))
-    # Variant without the optional content
-    results.extend(_expand_optionals(prefix + suffix))
-    return results
+class _Alt(NamedTuple):
+    """(a|b|c) — exactly one of the options."""
 
+    options: tuple
 
-def _expand_alternatives(template: str) -> list[str]:
-    """Expand (alt1|alt2|...) into one variant per alternative."""
-    match = re.search(r"\(([^()]*)\)", template)
-    if not match:
-        return [template]
 
-    prefix = template[: match.start()]
-    suffix = template[match.end() :]
-    alternatives = match.group(1).split("|")
+class _Opt(NamedTuple):
+    """[content] — content or nothing."""
 
-    results: list[str] = []
-    for alt in alternatives:
-        results.extend(_expand_alternatives(prefix + alt.strip() + suffix))
-    return results
+    item: object
+
+
+class _RuleRef(NamedTuple):
+    """<rule> — reference to an expansion rule, resolved at enumeration time."""
+
+    name: str
+
+
+_EMPTY = _Text("")
+_RULE_NAME_RE = re.compile(r"^\w+$")
+
+
+class _TemplateParser:
+    """Recursive-descent parser for the Hassil template syntax subset we support."""
+
+    def __init__(self, template: str):
+        self.template = template
+        self.pos = 0
+
+    def parse(self):
+        node = self._parse_alternatives(closer=None)
+        # Stray closing brackets are kept as literal text
+        while self.pos < len(self.template):
+            rest = _TemplateParser(self.template[self.pos + 1 :]).parse()
+            node = _make_seq([node, _Text(self.template[self.pos]), rest])
+            self.pos = len(self.template)
+        return node
+
+    def _parse_alternatives(self, closer: str | None, strip: bool = False):
+        options = [self._parse_sequence(closer, strip)]
+        while self.pos < len(self.template) and self.template[self.pos] == "|":
+            self.pos += 1
+            options.append(self._parse_sequence(closer, strip))
+        if len(options) == 1:
+            return options[0]
+        return _Alt(tuple(options))
+
+    def _parse_sequence(self, closer: str | None, strip: bool):
+        items: list = []
+        text: list[str] = []
+        template = self.template
+
+        while self.pos < len(template):
+            char = template[self.pos]
+            if char == "|" or char == closer or (closer is None and char in ")]"):
+                break
+
+            if char == "(" or char == "[":
+                if text:
+                    items.append(_Text("".join(text)))
+                    text = []
+                self.pos += 1
+                if char == "(":
+                    items.append(self._parse_alternatives(closer=")", strip=True))
+                else:
+                    items.append(_Opt(self._parse_alternatives(closer="]")))
+                # Consume the closing bracket (tolerate an unclosed group at EOF)
+                if self.pos < len(template):
+                    self.pos += 1
+                continue
+
+            if char == "<":
+                end = template.find(">", self.pos + 1)
+                name = template[self.pos + 1 : end] if end != -1 else ""
+                if _RULE_NAME_RE.match(name):
+                    if text:
+                        items.append(_Text("".join(text)))
+                        text = []
+                    items.append(_RuleRef(name))
+                    self.pos = end + 1
+                    continue
+
+            text.append(char)
+            self.pos += 1
+
+        if text:
+            items.append(_Text("".join(text)))
+
+        if strip and items:
+            if isinstance(items[0], _Text):
+                items[0] = _Text(items[0].text.lstrip())
+            if isinstance(items[-1], _Text):
+                items[-1] = _Text(items[-1].text.rstrip())
+
+        return _make_seq(items)
+
+
+def _make_seq(items: list):
+    """Build a sequence node, merging adjacent text and dropping empty text."""
+    merged: list = []
+    for item in items:
+        if isinstance(item, _Seq):
+            candidates = item.items
+        else:
+            candidates = (item,)
+        for node in candidates:
+            if isinstance(node, _Text):
+                if not node.text:
+                    continue
+                if merged and isinstance(merged[-1], _Text):
+                    merged[-1] = _Text(merged[-1].text + node.text)
+                    continue
+            merged.append(node)
+
+    if not merged:
+        return _EMPTY
+    if len(merged) == 1:
+        return merged[0]
+    return _Seq(tuple(merged))
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_template(template: str):
+    """Parse a template string into an AST (cached per template text)."""
+    return _TemplateParser(template).parse()
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_rule(rule_name: str, alternatives: tuple[str, ...]):
+    """Parse an expansion rule body (cached by rule name and definition)."""
+    if len(alternatives) == 1:
+        return _parse_template(alternatives[0])
+    return _Alt(tuple(_parse_template(alt) for alt in alternatives))
+
+
+def _rule_alternatives(value) -> tuple[str, ...]:
+    """Normalize an expansion_rules value (str, list[str], list[{"in": ...}]) to a tuple."""
+    if isinstance(value, str):
+        return (value,)
+    if isinstance(value, list):
+        values: list[str] = []
+        for item in value:
+            if isinstance(item, str):
+                values.append(item)
+            elif isinstance(item, dict) and "in" in item:
+                values.append(str(item["in"]))
+        return tuple(values)
+    return ()
+
+
+class _RuleSet:
+    """Lazy view of expansion_rules that hands out parsed (cached) rule ASTs."""
+
+    def __init__(self, expansion_rules: dict):
+        self._rules = expansion_rules
+        self._resolved: dict[str, object] = {}
+        self._warned: set[str] = set()
+
+    def get(self, rule_name: str):
+        node = self._resolved.get(rule_name)
+        if node is not None:
+            return node
+
+        alternatives = _rule_alternatives(self._rules.get(rule_name))
+        if alternatives:
+            node = _parse_rule(rule_name, alternatives)
+        else:
+            self.warn_once(rule_name, "Expansion rule <%s> not found, removing from template")
+            node = _EMPTY
+        self._resolved[rule_name] = node
+        return node
+
+    def warn_once(self, rule_name: str, message: str) -> None:
+        if rule_name not in self._warned:
+            self._warned.add(rule_name)
+            logger.warning(message, rule_name)
+
+
+def _enumerate(node, rules: _RuleSet, active_rules: frozenset) -> Iterator[str]:
+    """Lazily yield every raw (un-normalized) string a node can produce."""
+    if isinstance(node, _Text):
+        yield node.text
+    elif isinstance(node, _Seq):
+        yield from _enumerate_seq(node.items, 0, rules, active_rules)
+    elif isinstance(node, _Alt):
+        for option in node.options:
+            yield from _enumerate(option, rules, active_rules)
+    elif isinstance(node, _Opt):
+        yield from _enumerate(node.item, rules, active_rules)
+        yield ""
+    elif isinstance(node, _RuleRef):
+        if node.name in active_rules:
+            rules.warn_once(node.name, "Expansion rule <%s> references itself, removing from template")
+            yield ""
+            return
+        yield from _enumerate(rules.get(node.name), rules, active_rules | {node.name})
+
+
+def _enumerate_seq(items: tuple, index: int, rules: _RuleSet, active_rules: frozenset) -> Iterator[str]:
+    """Cartesian product of a sequence, leftmost item varying slowest."""
+    if index == len(items) - 1:
+        yield from _enumerate(items[index], rules, active_rules)
+        return
+    for head in _enumerate(items[index], rules, active_rules):
+        for tail in _enumerate_seq(items, index + 1, rules, active_rules):
+            yield head + tail
+
+
+def _random_walk(node, rules: _RuleSet, rng: random.Random, active_rules: frozenset) -> str:
+    """Produce one raw string by picking a random branch at every choice point."""
+    if isinstance(node, _Text):
+        return node.text
+    if isinstance(node, _Seq):
+        return "".join(_random_walk(item, rules, rng, active_rules) for item in node.items)
+    if isinstance(node, _Alt):
+        return _random_walk(rng.choice(node.options), rules, rng, active_rules)
+    if isinstance(node, _Opt):
+        return _random_walk(node.item, rules, rng, active_rules) if rng.random() < 0.5 else ""
+    if isinstance(node, _RuleRef):
+        if node.name in active_rules:
+            rules.warn_once(node.name, "Expansion rule <%s> references itself, removing from template")
+            return ""
+        return _random_walk(rules.get(node.name), rules, rng, active_rules | {node.name})
+    return ""
+
+
+def _iter_mixed_candidates(template: str, rules: _RuleSet, rng: random.Random) -> Iterator[str]:
+    """
+    Alternate in-order enumeration with random walks for one template.
+    Stops once the enumeration is exhausted: at that point every string has
+    been produced and further walks would only yield duplicates.
+    """
+    node = _parse_template(template)
+    for text in _enumerate(node, rules, frozenset()):
+        yield text
+        yield _random_walk(node, rules, rng, frozenset())
+
+
+def _iter_template_patterns(
+    template: str,
+    rules: _RuleSet,
+    budget: ExpansionBudget | None = None,
+) -> Iterator[str]:
+    """Yield normalized (possibly duplicate) patterns for one template."""
+    for text in _enumerate(_parse_template(template), rules, frozenset()):
+        if budget is not None:
+            budget.tick()
+        normalized = _normalize(text)
+        if normalized:
+            yield normalized
 
 
 def _normalize(text: str) -> str:
@@ -160,83 +504,193 @@ def expand_template(
     template: str,
     expansion_rules: dict[str, list[str]],
     max_patterns: int = MAX_PATTERNS,
+    budget: ExpansionBudget | None = None,
 ) -> list[str]:
     """
     Expand a single Hassil template string into concrete patterns.
 
-    Order of expansion:
-      1. Resolve <rule> references
-      2. Expand (alternatives)
-      3. Expand [optionals]
-      4. Normalize whitespace
-      5. Deduplicate
-      6. Cap at max_patterns
+    The template is parsed once (cached) and enumerated lazily:
+    <rule> references, (alternatives) and [optionals] are expanded on the fly,
+    whitespace is normalized and duplicates are dropped until exactly
+    max_patterns unique patterns exist, or until the expansion budget
+    (default: a fresh ExpansionBudget with the configured limits) runs out.
     """
-    # Step 1: resolve rule references
-    after_rules = _resolve_rules(template, expansion_rules)
-
-    # Step 2 + 3: expand alternatives and optionals
-    all_patterns: list[str] = []
-    for t in after_rules:
-        after_alts = _expand_alternatives(t)
-        for a in after_alts:
-            after_opts = _expand_optionals(a)
-            all_patterns.extend(after_opts)
-
-        # Early exit if we already have too many
-        if len(all_patterns) > max_patterns * 10:
-            break
-
-    # Step 4 + 5: normalize and deduplicate
-    seen: set[str] = set()
-    unique: list[str] = []
-    for p in all_patterns:
-        normalized = _normalize(p)
-        if normalized and normalized not in seen:
-            seen.add(normalized)
-            unique.append(normalized)
-
-    # Step 6: cap
-    if len(unique) > max_patterns:
-        logger.debug(
-            "Capping patterns from %d to %d for template: %s",
-            len(unique),
-            max_patterns,
-            template[:80],
-        )
-        unique = unique[:max_patterns]
-
-    return unique
+    return expand_intent_sentences([template], expansion_rules, max_patterns, budget)
 
 
 def expand_intent_sentences(
     sentences: list[str],
     expansion_rules: dict[str, list[str]],
     max_patterns: int = MAX_PATTERNS,
+    budget: ExpansionBudget | None = None,
+    sampling: str = PATTERN_SAMPLING,
+    seed: int = 0,
 ) -> list[str]:
     """
     Expand a list of Hassil template sentences for a single intent.
     Returns deduplicated patterns capped at max_patterns total.
+
+    Without a budget a fresh ExpansionBudget with the configured limits is
+    used. Every sentence gets its share of the budget
+    (ExpansionBudget.start_template); a sentence that runs out keeps the
+    patterns found so far and expansion continues with the next one.
+    budget.exceeded then describes the first violation and
+    budget.exceeded["template"] names the template being expanded.
+
+    With sampling="diverse" the candidate pool mixes in-order enumeration with
+    seeded random walks (so later alternatives are reachable without
+    enumerating the full product) and select_diverse() picks the subset.
     """
+    if budget is None:
+        budget = ExpansionBudget()
+    rules = _RuleSet(expansion_rules)
+
+    if sampling == "diverse":
+        rng = random.Random(seed)
+        sources = [(sentence, _iter_mixed_candidates(sentence, rules, rng)) for sentence in sentences]
+        return _sample_diverse(sources, max_patterns, budget, seed)
+
     all_patterns: list[str] = []
     seen: set[str] = set()
 
-    for sentence in sentences:
-        expanded = expand_template(sentence, expansion_rules, max_patterns)
-        for p in expanded:
-            if p not in seen:
-                seen.add(p)
-                all_patterns.append(p)
-            if len(all_patterns) >= max_patterns:
-                break
-        if len(all_patterns) >= max_patterns:
+    for index, sentence in enumerate(sentences):
+        if budget.exhausted:
             break
+        budget.start_template(len(sentences) - index)
+        try:
+            for pattern in _iter_template_patterns(sentence, rules, budget):
+                if pattern in seen:
+                    continue
+                seen.add(pattern)
+                all_patterns.append(pattern)
+                if len(all_patterns) >= max_patterns:
+                    return all_patterns
+        except ExpansionBudgetExceeded:
+            budget.exceeded.setdefault("template", sentence)
 
     return all_patterns
 
 
 # ===================================================================
-# hassil-based expansion (preferred when _USE_HASSIL is True)
+# Diversity-aware sampling (PATTERN_SAMPLING=diverse)
+#
+# Enumeration order favours the first alternative of every group, so the
+# first N patterns are near-duplicates. Instead, a pool of up to
+# max_patterns * SAMPLING_POOL_FACTOR unique candidates is drawn round-robin
+# from all sentences and a greedy max-coverage pass picks N of them: each
+# pick maximises the number of not-yet-covered features (words and word
+# bigrams), with not-yet-covered source sentences taking precedence. Ties are broken by a seeded shuffle so the result is
+# stable across runs and content hashes only change when the YAML does.
+# ===================================================================
+
+
+def sampling_seed(domain: str, intent_name: str) -> int:
+    """Deterministic per-intent seed (hash() is randomized per process)."""
+    return zlib.crc32(f"{domain}:{intent_name}".encode("utf-8"))
+
+
+def _pattern_features(pattern: str) -> frozenset:
+    words = pattern.lower().split()
+    features: set = {("word", word) for word in words}
+    features.update(("bigram", a, b) for a, b in zip(words, words[1:]))
+    return frozenset(features)
+
+
+def select_diverse(candidates: list[tuple[str, int]], n: int, seed: int = 0) -> list[str]:
+    """
+    Pick n patterns from (pattern, source_index) candidates that together cover
+    as many distinct features as possible (lazy greedy max-coverage).
+
+    Every source sentence is covered before feature gains are compared, so no
+    sentence shape is lost as long as n allows it. Once every remaining
+    candidate adds nothing new, coverage is reset and a new round starts.
+    Returns the picks in candidate order.
+    """
+    if len(candidates) <= n:
+        return [pattern for pattern, _ in candidates]
+
+    rng = random.Random(seed)
+    rank = list(range(len(candidates)))
+    rng.shuffle(rank)
+    features = [_pattern_features(pattern) for pattern, _ in candidates]
+    sentence_bonus = 1 + max(len(f) for f in features)
+
+    covered: set = set()
+    covered_sources: set[int] = set()
+
+    def gain(i: int) -> int:
+        new = len(features[i] - covered)
+        if candidates[i][1] not in covered_sources:
+            new += sentence_bonus
+        return new
+
+    heap = [(-gain(i), rank[i], i) for i in range(len(candidates))]
+    heapq.heapify(heap)
+    chosen: list[int] = []
+
+    while heap and len(chosen) < n:
+        _, tiebreak, i = heapq.heappop(heap)
+        current = gain(i)
+        if heap and current < -heap[0][0]:
+            # Stale upper bound: re-queue with the current gain
+            heapq.heappush(heap, (-current, tiebreak, i))
+            continue
+        if current == 0 and covered:
+            # Everything left is already covered: start a new coverage round
+            covered = set()
+            covered_sources = set()
+            heap.append((0, tiebreak, i))
+            heap = [(-gain(j), rank[j], j) for _, _, j in heap]
+            heapq.heapify(heap)
+            continue
+        chosen.append(i)
+        covered |= features[i]
+        covered_sources.add(candidates[i][1])
+
+    return [candidates[i][0] for i in sorted(chosen)]
+
+
+def _sample_diverse(
+    sources: list[tuple[str, Iterator[str]]],
+    max_patterns: int,
+    budget: ExpansionBudget | None,
+    seed: int,
+) -> list[str]:
+    """
+    Build the candidate pool round-robin from (template, raw strings) sources
+    and return select_diverse() of it. A budget violation stops pool building;
+    the subset is then chosen from what was collected.
+    """
+    pool_size = max(max_patterns * SAMPLING_POOL_FACTOR, max_patterns)
+    candidates: list[tuple[str, int]] = []
+    seen: set[str] = set()
+    active = [(index, template, iter(texts)) for index, (template, texts) in enumerate(sources)]
+    template = ""
+
+    try:
+        while active and len(candidates) < pool_size:
+            alive = []
+            for index, template, texts in active:
+                for text in texts:
+                    if budget is not None:
+                        budget.tick()
+                    pattern = _normalize(text)
+                    if pattern and pattern not in seen:
+                        seen.add(pattern)
+                        candidates.append((pattern, index))
+                        alive.append((index, template, texts))
+                        break
+                if len(candidates) >= pool_size:
+                    break
+            active = alive
+    except ExpansionBudgetExceeded:
+        budget.exceeded.setdefault("template", template)
+
+    return select_diverse(candidates, max_patterns, seed)
+
+
+# ===================================================================
+# hassil-based expansion (preferred when hassil_available())
 # ===================================================================
 
 
@@ -308,12 +762,14 @@ def _expand_with_hassil(
     yaml_data: dict,
     domain: str,
     max_patterns: int = MAX_PATTERNS,
+    diagnostics: list[dict] | None = None,
 ) -> list[dict]:
     """
     Use the hassil library to parse and expand intent templates.
 
     Returns the same format as the custom path: list of dicts with
     domain, intent, service, language, patterns, source, default_parameters.
+    Intents that exceed their expansion budget are appended to diagnostics.
 
     Raises on import-level errors (caller should catch and fall back).
     Individual intent errors fall back to custom expansion per-intent.
@@ -349,6 +805,7 @@ def _expand_with_hassil(
         normalized_data["intents"] = normalized_intents
 
     # Parse the full YAML with hassil (includes expansion_rules, lists, intents)
+    Intents, sample_sentence = _hassil()
     hassil_intents = Intents.from_dict(normalized_data)
 
     results: list[dict] = []
@@ -375,10 +832,11 @@ def _expand_with_hassil(
                 default_parameters["requires_domain"] = requires_context["domain"]
 
         # Expand sentences using hassil with intent-level fallback
+        budget = ExpansionBudget()
+        seed = sampling_seed(domain, intent_name)
         try:
-            all_patterns: list[str] = []
-            seen: set[str] = set()
-
+            # One lazy (template text, sample generator) source per sentence
+            sources: list[tuple[str, Iterator[str]]] = []
             for intent_data in intent_obj.data:
                 # Merge local expansion rules with global ones
                 if intent_data.expansion_rules:
@@ -390,23 +848,40 @@ def _expand_with_hassil(
                     local_rules = hassil_intents.expansion_rules
 
                 for sentence in intent_data.sentences:
-                    for text in sample_sentence(
-                        sentence,
-                        slot_lists=hassil_intents.slot_lists,
-                        expansion_rules=local_rules,
-                        language=language,
-                        expand_lists=False,
-                    ):
-                        normalized = _normalize(text)
-                        if normalized and normalized not in seen:
-                            seen.add(normalized)
-                            all_patterns.append(normalized)
-                        if len(all_patterns) >= max_patterns:
-                            break
+                    sources.append((
+                        getattr(sentence, "text", None) or str(sentence),
+                        sample_sentence(
+                            sentence,
+                            slot_lists=hassil_intents.slot_lists,
+                            expansion_rules=local_rules,
+                            language=language,
+                            expand_lists=False,
+                        ),
+                    ))
+
+            if PATTERN_SAMPLING == "diverse":
+                all_patterns = _sample_diverse(sources, max_patterns, budget, seed)
+            else:
+                all_patterns = []
+                seen: set[str] = set()
+                for index, (budget_template, texts) in enumerate(sources):
+                    if budget.exhausted:
+                        break
+                    # Each sentence gets its share of the intent budget
+                    budget.start_template(len(sources) - index)
+                    try:
+                        for text in texts:
+                            budget.tick()
+                            normalized = _normalize(text)
+                            if normalized and normalized not in seen:
+                                seen.add(normalized)
+                                all_patterns.append(normalized)
+                            if len(all_patterns) >= max_patterns:
+                                break
+                    except ExpansionBudgetExceeded:
+                        budget.exceeded.setdefault("template", budget_template)
                     if len(all_patterns) >= max_patterns:
                         break
-                if len(all_patterns) >= max_patterns:
-                    break
 
         except Exception as exc:
             # Intent-level fallback: use custom expansion for this intent only
@@ -422,7 +897,10 @@ def _expand_with_hassil(
                 raw_sentences.extend(block.get("sentences", []))
 
             expansion_rules = yaml_data.get("expansion_rules", {})
-            all_patterns = expand_intent_sentences(raw_sentences, expansion_rules, max_patterns)
+            budget = ExpansionBudget()  # fresh budget for the fallback engine
+            all_patterns = expand_intent_sentences(
+                raw_sentences, expansion_rules, max_patterns, budget, seed=seed
+            )
 
         if not all_patterns:
             # If hassil produced 0 patterns, try custom expansion as last resort
@@ -437,10 +915,15 @@ def _expand_with_hassil(
                     domain,
                 )
                 expansion_rules = yaml_data.get("expansion_rules", {})
+                # hassil may have used up the budget -- the fallback gets its own
+                budget = ExpansionBudget()
                 all_patterns = expand_intent_sentences(
-                    raw_sentences_fallback, expansion_rules, max_patterns
+                    raw_sentences_fallback, expansion_rules, max_patterns, budget, seed=seed
                 )
 
+        if budget.exceeded is not None:
+            _report_budget_exceeded(budget, domain, intent_name, len(all_patterns), diagnostics)
+
         if not all_patterns:
             logger.warning(
                 "Intent %s in domain %s expanded to 0 patterns (both paths), skipping",
@@ -476,21 +959,144 @@ def _expand_with_hassil(
 # ===================================================================
 
 
+def merge_common_rules(domain_yamls: dict[str, dict]) -> dict[str, list[str]]:
+    """Extract expansion_rules from _common.yaml (if present) as shared rules."""
+    common = domain_yamls.get("_common", {})
+    shared_rules: dict[str, list[str]] = {}
+
+    # expansion_rules from _common
+    for rule_name, alternatives in common.get("expansion_rules", {}).items():
+        if isinstance(alternatives, list):
+            shared_rules[rule_name] = alternatives
+        elif isinstance(alternatives, str):
+            # Wrap string-type rules in a single-item list so both the custom
+            # expansion path (iterates over list items) and the hassil path
+            # (_normalize_expansion_rules converts back to string) work correctly.
+            shared_rules[rule_name] = [alternatives]
+        else:
+            logger.warning(
+                "Skipping _common expansion_rules[%s] with unsupported type %s",
+                rule_name,
+                type(alternatives).__name__,
+            )
+
+    # lists from _common
+    for list_name, list_def in common.get("lists", {}).items():
+        if list_name not in shared_rules and isinstance(list_def, dict):
+            values = list_def.get("values", [])
+            str_values = []
+            for v in values:
+                if isinstance(v, dict) and "in" in v:
+                    str_values.append(str(v["in"]))
+                elif isinstance(v, str):
+                    str_values.append(v)
+            if str_values:
+                shared_rules[list_name] = str_values
+
+    return shared_rules
+
+
+# alice-ha-sync uses the stored signatures and keeps a minimal copy of
+# _SLOT_RE, _VALUE_SLOTS and pattern_slot_signature (_scan_pattern_slots in
+# alice-ha-sync/main.py) for templates without pattern_slots: change both
+# together and bump TEMPLATE_FORMAT_VERSION so stored signatures are rewritten.
+# Slot placeholders as filled by alice-ha-sync ({name}, {area}, {where}, ...)
+_SLOT_RE = re.compile(r"\{(\w+)\}")
+# Slots that need a runtime value; such patterns are not vectorised per entity
+_VALUE_SLOTS = frozenset({"value", "message", "temperature"})
+
+
+def pattern_slot_signature(pattern: str) -> dict:
+    """
+    Slot signature of an expanded pattern, stored per pattern in
+    ha_intent_templates.pattern_slots:
+      slots:   slot names in order of first occurrence
+      skip:    True if the pattern contains a value slot (see _VALUE_SLOTS)
+      offsets: [slot, start, end] of every placeholder occurrence
+    """
+    offsets = [[m.group(1), m.start(), m.end()] for m in _SLOT_RE.finditer(pattern)]
+    slots = list(dict.fromkeys(slot for slot, _, _ in offsets))
+    return {
+        "slots": slots,
+        "skip": any(slot in _VALUE_SLOTS for slot in slots),
+        "offsets": offsets,
+    }
+
+
+def prepare_domain_yaml(yaml_data: dict, shared_rules: dict[str, list[str]], language: str) -> dict:
+    """
+    Return a copy of a domain YAML ready for parse_intent_yaml(): the shared
+    _common rules merged under its own expansion_rules and a default language.
+    The input is only shallow-copied and never mutated (parsed YAML is cached
+    across syncs).
+    """
+    prepared = dict(yaml_data)
+    prepared.setdefault("language", language)
+
+    # Merge shared rules into domain-specific rules
+    domain_rules = dict(shared_rules)
+    domain_rules.update(prepared.get("expansion_rules", {}))
+    prepared["expansion_rules"] = domain_rules
+    return prepared
+
+
+def _report_budget_exceeded(
+    budget: ExpansionBudget,
+    domain: str,
+    intent_name: str,
+    patterns: int,
+    diagnostics: list[dict] | None,
+) -> None:
+    diagnostic = budget.diagnostic(domain, intent_name, patterns)
+    logger.warning(
+        "Intent %s (domain=%s) hit the expansion budget (%s after %d candidates, %d ms), "
+        "keeping %d patterns; template: %s",
+        intent_name,
+        domain,
+        diagnostic["reason"],
+        diagnostic["candidates"],
+        diagnostic["elapsed_ms"],
+        patterns,
+        diagnostic["template"],
+    )
+    if diagnostics is not None:
+        diagnostics.append(diagnostic)
+
+
 def parse_intent_yaml(
     yaml_data: dict,
     domain: str,
     max_patterns: int = MAX_PATTERNS,
+    diagnostics: list[dict] | None = None,
+    engine: str | None = None,
 ) -> list[dict]:
     """
     Parse a single HA intent YAML structure and return a list of dicts:
       [{"domain": str, "intent": str, "language": "de",
         "patterns": list[str], "source": "github",
         "default_parameters": dict | None}, ...]
+
+    Intents that hit their expansion budget are appended to diagnostics
+    (domain, intent, template, reason, candidates, elapsed_ms, patterns).
+
+    engine forces "hassil" or "custom" (e.g. for benchmarks); the default
+    uses hassil when it is installed. Forcing "hassil" still falls back to
+    the custom engine per intent or domain on hassil errors.
     """
+    if engine not in (None, "hassil", "custom"):
+        raise ValueError(f"Unknown expansion engine: {engine!r}")
+    use_hassil = engine != "custom" and hassil_available()
+    if engine == "hassil" and not use_hassil:
+        raise RuntimeError("hassil library not available")
+
     # --- hassil path (preferred) ---
-    if _USE_HASSIL:
+    if use_hassil:
         try:
-            return _expand_with_hassil(yaml_data, domain, max_patterns)
+            hassil_diagnostics: list[dict] = []
+            results = _expand_with_hassil(yaml_data, domain, max_patterns, hassil_diagnostics)
+            if diagnostics is not None:
+                diagnostics.extend(hassil_diagnostics)
+            return results
         except Exception as exc:
             logger.warning(
                 "hassil expansion failed for domain %s (%s), falling back to custom expansion",
@@ -553,7 +1159,16 @@ def parse_intent_yaml(
             logger.warning("Intent %s in domain %s has no sentences, skipping", intent_name, domain)
             continue
 
-        patterns = expand_intent_sentences(all_sentences, expansion_rules, max_patterns)
+        budget = ExpansionBudget()
+        patterns = expand_intent_sentences(
+            all_sentences,
+            expansion_rules,
+            max_patterns,
+            budget,
+            seed=sampling_seed(domain, intent_name),
+        )
+        if budget.exceeded is not None:
+            _report_budget_exceeded(budget, domain, intent_name, len(patterns), diagnostics)
 
         if not patterns:
             logger.warning(
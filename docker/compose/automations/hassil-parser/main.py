@@ -3,37 +3,86 @@ hassil-parser: FastAPI service for expanding Home Assistant intent templates.
 
 Endpoints:
   GET  /health                   - Health check
-  POST /intents/sync             - Download + expand + upsert HA intents
+  POST /intents/sync             - Start a background sync job: download + expand + upsert HA intents
+                                   (?languages=de&languages=en, ?force=true, ?wait=true)
+  GET  /intents/sync/{job_id}    - Status and per-phase progress of a sync job
   POST /intents/trigger-entity-sync - Publish MQTT event only
 """
 
-import io
+import asyncio
+import functools
+import hashlib
+import importlib
 import json
 import logging
+import multiprocessing
 import os
+import re
+import tempfile
+import threading
 import time
+import uuid
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
 from urllib.parse import urlparse
 
-import httpx
-import psycopg2
-import psycopg2.extras
-import yaml
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Response
 
-from expand_ha_intents import parse_intent_yaml
+from expand_ha_intents import (
+    EXPANSION_CANDIDATE_BUDGET,
+    EXPANSION_TIME_BUDGET_MS,
+    PATTERN_SAMPLING,
+    SAMPLING_POOL_FACTOR,
+    expansion_engine,
+    merge_common_rules,
+    parse_intent_yaml,
+    pattern_slot_signature,
+    prepare_domain_yaml,
+)
 
 # ---------------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------------
 POSTGRES_CONNECTION = os.environ.get("POSTGRES_CONNECTION", "")
 MQTT_URL = os.environ.get("MQTT_URL", "")
+# Seconds a publish may wait for the broker connection and its PUBACK
+MQTT_PUBLISH_TIMEOUT = float(os.environ.get("MQTT_PUBLISH_TIMEOUT", "10"))
 MAX_PATTERNS_PER_INTENT = int(os.environ.get("MAX_PATTERNS_PER_INTENT", "50"))
+# Worker processes for per-domain expansion (0 = one per CPU core)
+EXPAND_WORKERS = int(os.environ.get("EXPAND_WORKERS", "0")) or (os.cpu_count() or 1)
+# "bulk" = one execute_values statement for all templates, "row" = one statement per template
+UPSERT_MODE = os.environ.get("UPSERT_MODE", "bulk").lower()
 DATA_INBOX_PATH = Path("/data_inbox")
+# Local cache of the intents archive (+ ETag/Last-Modified) for conditional downloads
+INTENTS_CACHE_DIR = Path(os.environ.get("INTENTS_CACHE_DIR", "/cache"))
+
+# Import the parsing stack and start the worker pool right after startup
+# (false = everything loads on the first sync)
+WARMUP_ON_STARTUP = os.environ.get("WARMUP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+# Finished sync jobs kept for GET /intents/sync/{job_id}
+SYNC_JOB_HISTORY = int(os.environ.get("SYNC_JOB_HISTORY", "20"))
+
+# Languages synced when /intents/sync is called without ?languages=
+HA_LANGUAGES = [
+    lang.strip() for lang in os.environ.get("HA_LANGUAGES", "de").split(",") if lang.strip()
+]
 
 HA_INTENTS_ZIP_URL = "https://github.com/OHF-Voice/intents/archive/refs/heads/main.zip"
-HA_SENTENCES_PREFIX = "intents-main/sentences/de/"
+HA_SENTENCES_ROOT = "intents-main/sentences/"
+_LANGUAGE_RE = re.compile(r"^[A-Za-z]{2,3}(?:[-_][A-Za-z0-9]{2,8})*$")
+_ARCHIVE_FILE = "intents-main.zip"
+_ARCHIVE_META_FILE = "intents-main.json"
+# Present while a templates_updated event still has to be published
+# (upsert changed templates but the MQTT publish failed); survives restarts
+_PUBLISH_PENDING_FILE = "templates-publish-pending"
+_DOWNLOAD_CHUNK_SIZE = 256 * 1024
+# Bump when the stored template format changes: forces every domain to be
+# re-expanded and rewritten on the next sync (2 = pattern_slots)
+TEMPLATE_FORMAT_VERSION = 2
 
 # ---------------------------------------------------------------------------
 # Logging
@@ -44,10 +93,231 @@ logging.basicConfig(
 )
 logger = logging.getLogger("hassil-parser")
 
+# ---------------------------------------------------------------------------
+# Process pool for CPU-bound template expansion
+# ---------------------------------------------------------------------------
+_process_pool: ProcessPoolExecutor | None = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """
+    Return the shared expansion process pool, creating it on first use.
+    Workers are started via forkserver: the pool is created after the MQTT loop
+    thread and HTTP/DB clients are running, and forking a multi-threaded
+    process can deadlock children on inherited locks.
+    """
+    global _process_pool
+    if _process_pool is None:
+        logger.info("Starting expansion process pool with %d workers", EXPAND_WORKERS)
+        _process_pool = ProcessPoolExecutor(
+            max_workers=EXPAND_WORKERS,
+            mp_context=multiprocessing.get_context("forkserver"),
+        )
+    return _process_pool
+
+
+def _shutdown_process_pool(wait: bool = True) -> None:
+    """Shut down the expansion process pool (a new one is created on next use)."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=wait, cancel_futures=True)
+        _process_pool = None
+
+
+# ---------------------------------------------------------------------------
+# MQTT publisher (one persistent broker connection for the app's lifetime)
+# ---------------------------------------------------------------------------
+class MQTTPublisher:
+    """
+    Long-lived MQTT connection used for all publishes.
+
+    start() connects in the background; paho's network loop reconnects
+    automatically after a connection drop. publish() sends over the shared
+    connection and waits for the PUBACK.
+    """
+
+    def __init__(self, url: str):
+        import paho.mqtt.client as mqtt
+
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 1883
+        self._connected = threading.Event()
+
+        self.client = mqtt.Client(
+            callback_api_version=mqtt.CallbackAPIVersion.VERSION2,
+            client_id="hassil-parser",
+            protocol=mqtt.MQTTv311,
+        )
+        if parsed.username:
+            self.client.username_pw_set(parsed.username, parsed.password)
+
+        self.client.on_connect = self._on_connect
+        self.client.on_disconnect = self._on_disconnect
+        self.client.reconnect_delay_set(min_delay=1, max_delay=60)
+
+    def start(self) -> None:
+        """Connect asynchronously and start the network loop in a background thread."""
+        logger.info("Connecting to MQTT broker %s:%d", self.host, self.port)
+        self.client.connect_async(self.host, self.port, keepalive=60)
+        self.client.loop_start()
+
+    def stop(self) -> None:
+        self.client.disconnect()
+        self.client.loop_stop()
+
+    def _on_connect(self, client, userdata, flags, rc, properties=None):
+        if rc == 0:
+            logger.info("MQTT connected to %s:%d", self.host, self.port)
+            self._connected.set()
+        else:
+            logger.error("MQTT connection failed with code %s", rc)
+
+    def _on_disconnect(self, client, userdata, flags, rc, properties=None):
+        self._connected.clear()
+        if rc != 0:
+            logger.warning("MQTT disconnected unexpectedly (rc=%s), will auto-reconnect", rc)
+
+    def publish(self, topic: str, payload: dict, timeout: float = MQTT_PUBLISH_TIMEOUT) -> None:
+        """
+        Publish a JSON message with QoS 1 and wait for the PUBACK.
+        Raises RuntimeError if the broker is not reachable or does not
+        acknowledge within timeout seconds.
+        """
+        deadline = time.monotonic() + timeout
+        if not self._connected.wait(timeout):
+            raise RuntimeError(f"MQTT broker {self.host}:{self.port} not connected")
+
+        result = self.client.publish(topic, json.dumps(payload), qos=1)
+        result.wait_for_publish(timeout=max(0.0, deadline - time.monotonic()))
+        if not result.is_published():
+            raise RuntimeError(f"MQTT publish timed out (no PUBACK within {timeout:g}s)")
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected.is_set()
+
+
+_mqtt_publisher: MQTTPublisher | None = None
+_mqtt_publisher_lock = threading.Lock()
+
+
+def _get_mqtt_publisher() -> MQTTPublisher:
+    """Return the shared MQTT publisher, connecting it on first use."""
+    global _mqtt_publisher
+    with _mqtt_publisher_lock:
+        if _mqtt_publisher is None:
+            _mqtt_publisher = MQTTPublisher(MQTT_URL)
+            _mqtt_publisher.start()
+        return _mqtt_publisher
+
+
+def _shutdown_mqtt_publisher() -> None:
+    global _mqtt_publisher
+    with _mqtt_publisher_lock:
+        if _mqtt_publisher is not None:
+            _mqtt_publisher.stop()
+            _mqtt_publisher = None
+
+
+# ---------------------------------------------------------------------------
+# Startup warm-up
+#
+# Only FastAPI is imported at module load, so the server accepts requests
+# (and answers /health) as early as possible. httpx, psycopg2, yaml and
+# hassil are imported where they are used; the warm-up task loads them in
+# the background right after startup so the first sync does not pay for it.
+# ---------------------------------------------------------------------------
+_startup: dict = {"ready_after_ms": None, "warmup": {"status": "disabled"}}
+_warmup_task: asyncio.Task | None = None
+
+
+def _process_uptime_ms() -> int | None:
+    """Milliseconds since this process was started (Linux /proc; None elsewhere)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the "(comm)" part; starttime is field 22 of the whole line
+            fields = f.read().rpartition(")")[2].split()
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        return int((time.clock_gettime(time.CLOCK_BOOTTIME) - started) * 1000)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _warm_up_worker(_index: int = 0) -> bool:
+    """Import the parsing stack inside an expansion worker process."""
+    import yaml  # noqa: F401
+
+    from expand_ha_intents import hassil_available
+
+    return hassil_available()
+
+
+def _warm_up_process_pool() -> dict:
+    """Start the expansion workers and load yaml/hassil in them (best effort per worker)."""
+    hassil = _get_process_pool().map(_warm_up_worker, range(EXPAND_WORKERS))
+    return {"workers": EXPAND_WORKERS, "hassil": all(hassil)}
+
+
+async def _warm_up() -> None:
+    """Run the warm-up steps one after another in a thread, recording their timings."""
+    report = _startup["warmup"]
+    report.update(status="running", steps={})
+    steps = [
+        ("httpx", functools.partial(importlib.import_module, "httpx")),
+        ("psycopg2", functools.partial(importlib.import_module, "psycopg2.extras")),
+        ("process_pool", _warm_up_process_pool),
+    ]
+    if MQTT_URL:
+        # Connect early so the first publish does not pay the handshake
+        steps.insert(0, ("mqtt", _get_mqtt_publisher))
+
+    failed = False
+    for name, func in steps:
+        started = time.perf_counter()
+        step: dict = {}
+        try:
+            details = await asyncio.to_thread(func)
+            step["status"] = "done"
+            if isinstance(details, dict):
+                step.update(details)
+        except Exception as exc:
+            logger.warning("Warm-up step %s failed: %s", name, exc)
+            step.update(status="failed", error=str(exc))
+            failed = True
+        step["duration_ms"] = int((time.perf_counter() - started) * 1000)
+        report["steps"][name] = step
+
+    report["status"] = "failed" if failed else "done"
+    report["finished_after_ms"] = _process_uptime_ms()
+    logger.info("Warm-up %s after %s ms: %s", report["status"], report["finished_after_ms"], report["steps"])
+
+
 # ---------------------------------------------------------------------------
 # FastAPI app
 # ---------------------------------------------------------------------------
-app = FastAPI(title="hassil-parser", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _warmup_task
+    if not MQTT_URL:
+        logger.warning("MQTT_URL not set, MQTT events will not be published")
+    if WARMUP_ON_STARTUP:
+        _startup["warmup"] = {"status": "pending"}
+        _warmup_task = asyncio.create_task(_warm_up())
+    _startup["ready_after_ms"] = _process_uptime_ms()
+    logger.info("Startup complete after %s ms", _startup["ready_after_ms"])
+    yield
+    if _warmup_task is not None:
+        _warmup_task.cancel()
+    for task in list(_sync_tasks):
+        task.cancel()
+    if _sync_tasks:
+        await asyncio.gather(*_sync_tasks, return_exceptions=True)
+    _shutdown_mqtt_publisher()
+    _shutdown_process_pool()
+
+
+app = FastAPI(title="hassil-parser", version="1.0.0", lifespan=lifespan)
 
 
 # ---------------------------------------------------------------------------
@@ -57,45 +327,23 @@ def _get_db_connection():
     """Create a PostgreSQL connection from the POSTGRES_CONNECTION env var."""
     if not POSTGRES_CONNECTION:
         raise RuntimeError("POSTGRES_CONNECTION environment variable is not set")
+    import psycopg2
+
     return psycopg2.connect(POSTGRES_CONNECTION)
 
 
 def _publish_mqtt(topic: str, payload: dict) -> None:
-    """Publish a single MQTT message and disconnect."""
-    import paho.mqtt.client as mqtt
-
+    """Publish a single MQTT message over the shared connection (blocks until PUBACK)."""
     if not MQTT_URL:
         logger.warning("MQTT_URL not set, skipping publish to %s", topic)
         return
 
-    parsed = urlparse(MQTT_URL)
-    host = parsed.hostname or "localhost"
-    port = parsed.port or 1883
-    username = parsed.username
-    password = parsed.password
-
-    client = mqtt.Client(
-        callback_api_version=mqtt.CallbackAPIVersion.VERSION2,
-        client_id="hassil-parser",
-        protocol=mqtt.MQTTv311,
-    )
-    if username:
-        client.username_pw_set(username, password)
-
     try:
-        client.loop_start()  # network loop required so the PUBLISH packet is actually transmitted
-        client.connect(host, port, keepalive=30)
-        result = client.publish(topic, json.dumps(payload), qos=1)
-        result.wait_for_publish(timeout=10)
-        if not result.is_published():
-            raise RuntimeError("MQTT publish timed out (no PUBACK within 10s)")
+        _get_mqtt_publisher().publish(topic, payload)
         logger.info("Published MQTT message to %s: %s", topic, payload)
     except Exception as exc:
         logger.error("Failed to publish MQTT message to %s: %s", topic, exc)
         raise
-    finally:
-        client.loop_stop()
-        client.disconnect()
 
 
 def _extract_domain_from_filename(filename: str) -> str:
@@ -107,239 +355,847 @@ def _extract_domain_from_filename(filename: str) -> str:
     return name
 
 
-def _download_and_extract_intents() -> dict[str, dict]:
+# Parsed YAML of the cached archive, reused while the archive file is unchanged
+_parsed_archive: dict = {}
+
+
+def _load_archive_meta() -> dict:
+    """Load ETag/Last-Modified of the cached archive (empty dict if unavailable)."""
+    try:
+        return json.loads((INTENTS_CACHE_DIR / _ARCHIVE_META_FILE).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _publish_pending() -> bool:
+    return (INTENTS_CACHE_DIR / _PUBLISH_PENDING_FILE).exists()
+
+
+def _set_publish_pending(pending: bool) -> None:
+    """Record whether a templates_updated event is still owed to alice-ha-sync."""
+    marker = INTENTS_CACHE_DIR / _PUBLISH_PENDING_FILE
+    try:
+        if pending:
+            INTENTS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            marker.touch()
+        else:
+            marker.unlink(missing_ok=True)
+    except OSError as exc:
+        logger.warning("Could not update publish-pending marker: %s", exc)
+
+
+def _fetch_intents_archive() -> tuple[Path, str]:
     """
-    Download the HA intents ZIP from GitHub and extract German YAML files.
-    Returns a dict mapping domain -> parsed YAML data.
+    Make sure an up-to-date intents archive exists in INTENTS_CACHE_DIR.
+
+    Sends a conditional request using the cached ETag/Last-Modified. On 304 the
+    cached archive is reused; if GitHub is unreachable the cached copy is used
+    as an offline fallback.
+
+    Returns (archive path, archive source: "downloaded" | "not_modified" | "cache_offline").
+    Raises httpx.HTTPError if the download fails and there is no cached copy.
     """
+    import httpx
+
+    archive_path = INTENTS_CACHE_DIR / _ARCHIVE_FILE
+    meta = _load_archive_meta() if archive_path.is_file() else {}
+
+    headers: dict[str, str] = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
     logger.info("Downloading HA intents from %s", HA_INTENTS_ZIP_URL)
+    INTENTS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path: str | None = None
+    try:
+        with httpx.Client(timeout=60.0, follow_redirects=True) as client:
+            with client.stream("GET", HA_INTENTS_ZIP_URL, headers=headers) as response:
+                if response.status_code == 304:
+                    logger.info("HA intents archive not modified, using cached copy")
+                    return archive_path, "not_modified"
+                response.raise_for_status()
+
+                # Stream straight to disk so the archive is never held in memory
+                with tempfile.NamedTemporaryFile(
+                    dir=INTENTS_CACHE_DIR, suffix=".part", delete=False
+                ) as tmp:
+                    tmp_path = tmp.name
+                    for chunk in response.iter_bytes(_DOWNLOAD_CHUNK_SIZE):
+                        tmp.write(chunk)
+                    size = tmp.tell()
+    except httpx.HTTPError as exc:
+        if tmp_path:
+            Path(tmp_path).unlink(missing_ok=True)
+        if not archive_path.is_file():
+            raise
+        logger.warning(
+            "Failed to download HA intents (%s), falling back to cached archive from %s",
+            exc,
+            meta.get("downloaded_at", "unknown"),
+        )
+        return archive_path, "cache_offline"
+
+    logger.info("Downloaded %d bytes", size)
+
+    # Atomic rename so a concurrent reader never sees a partial archive
+    os.replace(tmp_path, archive_path)
+
+    meta = {
+        "url": HA_INTENTS_ZIP_URL,
+        "etag": response.headers.get("etag"),
+        "last_modified": response.headers.get("last-modified"),
+        "size": size,
+        "downloaded_at": datetime.now(timezone.utc).isoformat(),
+    }
+    (INTENTS_CACHE_DIR / _ARCHIVE_META_FILE).write_text(json.dumps(meta))
+
+    return archive_path, "downloaded"
+
+
+def _load_intents(
+    archive_path: Path,
+    languages: list[str],
+) -> dict[str, tuple[dict[str, dict], dict[str, str]]]:
+    """
+    Extract the YAML files of the requested languages from the cached archive
+    (see _fetch_intents_archive).
+
+    The parsed YAML is kept in memory and reused as long as the cached archive
+    file is unchanged; only languages not parsed yet are extracted. Callers
+    must treat the returned dicts as read-only.
+
+    Returns language -> (domain -> parsed YAML data, domain -> sha256 of the
+    raw YAML entry).
+    """
+    stat = archive_path.stat()
+    cache_key = (str(archive_path), stat.st_size, stat.st_mtime_ns)
+    if _parsed_archive.get("key") != cache_key:
+        _parsed_archive.clear()
+        _parsed_archive.update(key=cache_key, languages={})
+
+    parsed_languages: dict = _parsed_archive["languages"]
+    missing = [lang for lang in languages if lang not in parsed_languages]
+    if missing:
+        parsed_languages.update(_extract_intents(archive_path, missing))
+    if len(missing) < len(languages):
+        logger.info("Reusing parsed YAML of cached archive")
 
-    with httpx.Client(timeout=60.0, follow_redirects=True) as client:
-        response = client.get(HA_INTENTS_ZIP_URL)
-        response.raise_for_status()
+    return {lang: parsed_languages[lang] for lang in languages}
 
-    logger.info("Downloaded %d bytes", len(response.content))
 
-    domain_yamls: dict[str, dict] = {}
+def _parse_yaml_entry(raw: bytes):
+    """Parse one YAML entry (runs inside an expansion worker process)."""
+    import yaml
 
-    with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
-        for entry in zf.namelist():
-            if not entry.startswith(HA_SENTENCES_PREFIX):
+    # libyaml-backed loader when available (same semantics as yaml.safe_load, much faster)
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(raw.decode("utf-8"), Loader=loader)
+
+
+def _extract_intents(
+    archive_path: Path,
+    languages: list[str],
+) -> dict[str, tuple[dict[str, dict], dict[str, str]]]:
+    """
+    Extract the YAML files of the given languages from the intents archive.
+
+    The central directory is read once and only entries under
+    sentences/<language>/ are decompressed; the YAML parsing of those entries
+    runs in parallel on the process pool. A crashed pool is replaced and the
+    parse retried once; BrokenProcessPool propagates if it crashes again.
+
+    Returns language -> (domain -> parsed YAML data, domain -> sha256 of the
+    raw YAML entry). Languages without any entries map to empty dicts.
+    """
+    prefixes = {f"{HA_SENTENCES_ROOT}{lang}/": lang for lang in languages}
+
+    keys: list[tuple[str, str]] = []
+    raws: list[bytes] = []
+    with zipfile.ZipFile(archive_path) as zf:
+        for info in zf.infolist():
+            entry = info.filename
+            if not entry.startswith(HA_SENTENCES_ROOT) or not entry.endswith(".yaml"):
                 continue
-            if not entry.endswith(".yaml"):
+            # sentences/<language>/<file>.yaml -- subdirectories are ignored
+            prefix, _, filename = entry.rpartition("/")
+            language = prefixes.get(prefix + "/")
+            if language is None:
                 continue
 
-            filename = entry.split("/")[-1]
-            domain = _extract_domain_from_filename(filename)
-
-            with zf.open(entry) as f:
-                content = f.read().decode("utf-8")
-                parsed = yaml.safe_load(content)
-                if parsed and isinstance(parsed, dict):
-                    domain_yamls[domain] = parsed
-                    logger.info("Parsed YAML for domain: %s", domain)
-
-    logger.info("Extracted %d domain YAML files from ZIP", len(domain_yamls))
-    return domain_yamls
-
-
-def _merge_common_rules(domain_yamls: dict[str, dict]) -> dict[str, list[str]]:
-    """Extract expansion_rules from _common.yaml (if present) as shared rules."""
-    common = domain_yamls.get("_common", {})
-    shared_rules: dict[str, list[str]] = {}
-
-    # expansion_rules from _common
-    for rule_name, alternatives in common.get("expansion_rules", {}).items():
-        if isinstance(alternatives, list):
-            shared_rules[rule_name] = alternatives
-        elif isinstance(alternatives, str):
-            # Wrap string-type rules in a single-item list so both the custom
-            # expansion path (iterates over list items) and the hassil path
-            # (_normalize_expansion_rules converts back to string) work correctly.
-            shared_rules[rule_name] = [alternatives]
-        else:
-            logger.warning(
-                "Skipping _common expansion_rules[%s] with unsupported type %s",
-                rule_name,
-                type(alternatives).__name__,
+            keys.append((language, _extract_domain_from_filename(filename)))
+            raws.append(zf.read(info))
+
+    for attempt in (1, 2):
+        try:
+            parsed_entries = list(_get_process_pool().map(_parse_yaml_entry, raws, chunksize=4))
+            break
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM) -- drop the broken pool, retry once on a fresh one
+            logger.error("YAML parse worker crashed (attempt %d of 2)", attempt)
+            _shutdown_process_pool(wait=False)
+            if attempt == 2:
+                raise
+
+    result: dict[str, tuple[dict[str, dict], dict[str, str]]] = {
+        lang: ({}, {}) for lang in languages
+    }
+    for (language, domain), raw, parsed in zip(keys, raws, parsed_entries):
+        if parsed and isinstance(parsed, dict):
+            domain_yamls, entry_hashes = result[language]
+            domain_yamls[domain] = parsed
+            entry_hashes[domain] = hashlib.sha256(raw).hexdigest()
+            logger.info("Parsed YAML for domain: %s (%s)", domain, language)
+
+    for language, (domain_yamls, _) in result.items():
+        logger.info("Extracted %d %s YAML files from ZIP", len(domain_yamls), language)
+    return result
+
+
+def _rules_hash(entry_hashes: dict[str, str]) -> str:
+    """
+    Fingerprint of everything besides the domain YAML that affects expansion:
+    the _common.yaml rules, the pattern cap, the sampling mode, the expansion
+    budget, the engine (hassil and its version, or custom) and the stored
+    template format. A change here invalidates every domain.
+    """
+    fingerprint = (
+        f"{entry_hashes.get('_common', '')}:{MAX_PATTERNS_PER_INTENT}"
+        f":{PATTERN_SAMPLING}:{SAMPLING_POOL_FACTOR}"
+        f":{EXPANSION_CANDIDATE_BUDGET}:{EXPANSION_TIME_BUDGET_MS}"
+        f":{expansion_engine()}:v{TEMPLATE_FORMAT_VERSION}"
+    )
+    return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+
+def _template_hash(tmpl: dict) -> str:
+    """Content hash of an expanded intent template (everything that is upserted)."""
+    content = json.dumps(
+        {
+            "service": tmpl["service"],
+            "patterns": tmpl["patterns"],
+            "pattern_slots": tmpl["pattern_slots"],
+            "source": tmpl["source"],
+            "default_parameters": tmpl["default_parameters"] or {},
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _load_source_hashes(languages: list[str]) -> dict[str, dict[str, tuple[str, str]]]:
+    """Load the stored (content_hash, rules_hash) per language and YAML entry of the last sync."""
+    conn = _get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT language, entry, content_hash, rules_hash
+                FROM alice.ha_intent_sources
+                WHERE language = ANY(%s)
+                """,
+                (languages,),
             )
+            stored: dict[str, dict[str, tuple[str, str]]] = {lang: {} for lang in languages}
+            for language, entry, content_hash, rules_hash in cur.fetchall():
+                stored[language][entry] = (content_hash, rules_hash)
+            return stored
+    finally:
+        conn.close()
+
+
+def _changed_domains(
+    entry_hashes: dict[str, str],
+    stored_hashes: dict[str, tuple[str, str]],
+    rules_hash: str,
+) -> list[str]:
+    """Return the (non-meta) domains whose YAML or shared rules changed since the last sync."""
+    return sorted(
+        domain
+        for domain, content_hash in entry_hashes.items()
+        if not domain.startswith("_")
+        and stored_hashes.get(domain) != (content_hash, rules_hash)
+    )
 
-    # lists from _common
-    for list_name, list_def in common.get("lists", {}).items():
-        if list_name not in shared_rules and isinstance(list_def, dict):
-            values = list_def.get("values", [])
-            str_values = []
-            for v in values:
-                if isinstance(v, dict) and "in" in v:
-                    str_values.append(str(v["in"]))
-                elif isinstance(v, str):
-                    str_values.append(v)
-            if str_values:
-                shared_rules[list_name] = str_values
 
-    return shared_rules
+def _expand_domain(
+    domain: str, yaml_data: dict, max_patterns: int
+) -> tuple[list[dict], list[dict]]:
+    """
+    Expand a single domain YAML (runs inside an expansion worker process).
+    Every template gets the slot signatures of its patterns (pattern_slots).
+    Returns (templates, expansion budget diagnostics).
+    """
+    diagnostics: list[dict] = []
+    templates = parse_intent_yaml(yaml_data, domain, max_patterns, diagnostics)
+    for tmpl in templates:
+        tmpl["pattern_slots"] = [pattern_slot_signature(p) for p in tmpl["patterns"]]
+    return templates, diagnostics
 
 
-def _upsert_templates(templates: list[dict]) -> dict[str, int]:
+async def _expand_domains(
+    work: dict[str, tuple[dict[str, dict], dict[str, list[str]], list[str]]],
+    progress: dict | None = None,
+) -> tuple[list[dict], dict[str, set[str]], list[dict]]:
+    """
+    Expand the given domains of all languages in parallel on the process pool.
+
+    work maps language -> (domain YAMLs, shared _common rules, domains to expand).
+    Domains are independent once the _common rules are merged in, so every
+    (language, domain) pair is submitted as its own task. Results are merged in
+    sorted (language, domain) order so the output does not depend on worker
+    scheduling.
+
+    If progress is given, progress["total"] and progress["completed"] track
+    the number of submitted and finished domains.
+
+    Returns (templates, language -> names of domains that failed to expand,
+    intents that hit their expansion budget).
+    """
+    loop = asyncio.get_running_loop()
+    pool = _get_process_pool()
+
+    keys: list[tuple[str, str]] = []
+    futures = []
+    for language in sorted(work):
+        domain_yamls, shared_rules, domains = work[language]
+        for domain in sorted(d for d in domains if not d.startswith("_")):  # skip meta files
+            yaml_data = prepare_domain_yaml(domain_yamls[domain], shared_rules, language)
+
+            keys.append((language, domain))
+            futures.append(
+                loop.run_in_executor(pool, _expand_domain, domain, yaml_data, MAX_PATTERNS_PER_INTENT)
+            )
+
+    if progress is not None:
+        progress.update(total=len(futures), completed=0)
+
+        def _count_completed(_future) -> None:
+            progress["completed"] += 1
+
+        for future in futures:
+            future.add_done_callback(_count_completed)
+
+    results = await asyncio.gather(*futures, return_exceptions=True)
+
+    all_templates: list[dict] = []
+    budget_exceeded: list[dict] = []
+    failed: dict[str, set[str]] = {language: set() for language in work}
+    for (language, domain), result in zip(keys, results):
+        if isinstance(result, BrokenProcessPool):
+            # A worker died (e.g. OOM) -- recreate the pool on the next sync
+            logger.error("Expansion worker crashed while parsing domain %s (%s)", domain, language)
+            _shutdown_process_pool(wait=False)
+            failed[language].add(domain)
+            continue
+        if isinstance(result, BaseException):
+            logger.error("Failed to parse domain %s (%s): %s", domain, language, result)
+            # Continue with other domains
+            failed[language].add(domain)
+            continue
+        templates, diagnostics = result
+        all_templates.extend(templates)
+        budget_exceeded.extend({"language": language, **diag} for diag in diagnostics)
+
+    return all_templates, failed, budget_exceeded
+
+
+_UPSERT_TEMPLATE_SQL = """
+    INSERT INTO alice.ha_intent_templates
+        (domain, intent, service, language, patterns, pattern_slots, source,
+         default_parameters, content_hash)
+    VALUES {values}
+    ON CONFLICT (domain, intent, language) DO UPDATE SET
+        service = EXCLUDED.service,
+        patterns = EXCLUDED.patterns,
+        pattern_slots = EXCLUDED.pattern_slots,
+        source = EXCLUDED.source,
+        default_parameters = EXCLUDED.default_parameters,
+        content_hash = EXCLUDED.content_hash,
+        updated_at = NOW()
+    WHERE alice.ha_intent_templates.content_hash
+          IS DISTINCT FROM EXCLUDED.content_hash
+    RETURNING (xmax = 0) AS is_insert
+"""
+
+
+def _upsert_template_rows_bulk(cur, rows: list[tuple]) -> list[bool]:
+    """Upsert all rows in a single INSERT ... VALUES statement via execute_values."""
+    import psycopg2.extras
+
+    return [
+        row[0]
+        for row in psycopg2.extras.execute_values(
+            cur,
+            _UPSERT_TEMPLATE_SQL.format(values="%s"),
+            rows,
+            template="(%s, %s, %s, %s, %s::jsonb, %s::jsonb, %s, %s::jsonb, %s)",
+            page_size=len(rows),
+            fetch=True,
+        )
+    ]
+
+
+def _upsert_template_rows_single(cur, rows: list[tuple]) -> list[bool]:
+    """Upsert rows one statement at a time (one round trip per template)."""
+    results: list[bool] = []
+    sql = _UPSERT_TEMPLATE_SQL.format(values="(%s, %s, %s, %s, %s, %s, %s, %s, %s)")
+    for row in rows:
+        cur.execute(sql, row)
+        result = cur.fetchone()
+        if result is not None:
+            results.append(result[0])
+    return results
+
+
+def _upsert_templates(
+    templates: list[dict],
+    sources: list[tuple[str, str, str, str]] | None = None,
+) -> dict[str, int]:
     """
     Upsert templates into alice.ha_intent_templates.
-    Returns counts: {"inserted": N, "updated": N, "skipped": N}
+
+    Rows whose content_hash is unchanged are left untouched (no new tuple, no
+    updated_at bump) and counted as "unchanged". If given, the source hashes
+    (language, entry, content_hash, rules_hash) are stored in the same
+    transaction so a failed upsert is retried on the next sync.
+
+    UPSERT_MODE=bulk (default) sends all rows in one statement; UPSERT_MODE=row
+    uses one statement per template.
+
+    Returns counts: {"inserted": N, "updated": N, "unchanged": N, "skipped": N}
     """
-    if not templates:
-        return {"inserted": 0, "updated": 0, "skipped": 0}
+    import psycopg2.extras
 
-    conn = _get_db_connection()
-    inserted = 0
-    updated = 0
+    if not templates and not sources:
+        return {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+
+    # Build rows; later duplicates of the same key win (a single INSERT
+    # cannot touch the same conflict target twice)
+    rows_by_key: dict[tuple[str, str, str], tuple] = {}
     skipped = 0
+    for tmpl in templates:
+        if not tmpl["patterns"]:
+            skipped += 1
+            continue
+        key = (tmpl["domain"], tmpl["intent"], tmpl["language"])
+        rows_by_key[key] = (
+            tmpl["domain"],
+            tmpl["intent"],
+            tmpl["service"],
+            tmpl["language"],
+            json.dumps(tmpl["patterns"]),
+            json.dumps(tmpl["pattern_slots"]),
+            tmpl["source"],
+            json.dumps(tmpl["default_parameters"] or {}),
+            _template_hash(tmpl),
+        )
+    rows = list(rows_by_key.values())
 
+    conn = _get_db_connection()
     try:
         with conn.cursor() as cur:
-            for tmpl in templates:
-                if not tmpl["patterns"]:
-                    skipped += 1
-                    continue
+            results: list[bool] = []
+            if rows:
+                if UPSERT_MODE == "row":
+                    results = _upsert_template_rows_single(cur, rows)
+                else:
+                    results = _upsert_template_rows_bulk(cur, rows)
 
-                cur.execute(
+            if sources:
+                psycopg2.extras.execute_values(
+                    cur,
                     """
-                    INSERT INTO alice.ha_intent_templates
-                        (domain, intent, service, language, patterns, source, default_parameters)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (domain, intent, language) DO UPDATE SET
-                        service = EXCLUDED.service,
-                        patterns = EXCLUDED.patterns,
-                        source = EXCLUDED.source,
-                        default_parameters = EXCLUDED.default_parameters,
-                        updated_at = NOW()
-                    RETURNING (xmax = 0) AS is_insert
+                    INSERT INTO alice.ha_intent_sources
+                        (language, entry, content_hash, rules_hash)
+                    VALUES %s
+                    ON CONFLICT (language, entry) DO UPDATE SET
+                        content_hash = EXCLUDED.content_hash,
+                        rules_hash = EXCLUDED.rules_hash,
+                        synced_at = NOW()
                     """,
-                    (
-                        tmpl["domain"],
-                        tmpl["intent"],
-                        tmpl["service"],
-                        tmpl["language"],
-                        json.dumps(tmpl["patterns"]),
-                        tmpl["source"],
-                        json.dumps(tmpl["default_parameters"] or {}),
-                    ),
+                    sources,
                 )
-                row = cur.fetchone()
-                if row and row[0]:
-                    inserted += 1
-                else:
-                    updated += 1
 
         conn.commit()
-        logger.info(
-            "Upsert complete: inserted=%d, updated=%d, skipped=%d",
-            inserted,
-            updated,
-            skipped,
-        )
     except Exception:
         conn.rollback()
         raise
     finally:
         conn.close()
 
-    return {"inserted": inserted, "updated": updated, "skipped": skipped}
+    # RETURNING yields one row per inserted/updated template; conflict rows
+    # filtered out by the WHERE clause (identical content) return nothing.
+    inserted = sum(1 for is_insert in results if is_insert)
+    updated = len(results) - inserted
+    unchanged = len(rows) - len(results)
+
+    logger.info(
+        "Upsert complete (%s): inserted=%d, updated=%d, unchanged=%d, skipped=%d",
+        UPSERT_MODE,
+        inserted,
+        updated,
+        unchanged,
+        skipped,
+    )
+
+    return {"inserted": inserted, "updated": updated, "unchanged": unchanged, "skipped": skipped}
 
 
 # ---------------------------------------------------------------------------
-# Endpoints
+# Background sync jobs
+#
+# POST /intents/sync starts _run_sync_job() as an asyncio task and returns
+# immediately; blocking work inside the job runs in threads or on the
+# process pool, so the event loop stays responsive. Only one sync runs at a
+# time and jobs live in memory (the last SYNC_JOB_HISTORY are kept).
 # ---------------------------------------------------------------------------
-@app.get("/health")
-async def health():
-    """Health check endpoint."""
-    inbox_accessible = DATA_INBOX_PATH.is_dir()
+_SYNC_PHASES = ("download", "parse", "expand", "upsert", "publish")
 
-    if inbox_accessible:
-        return {"status": "healthy"}
+_sync_jobs: dict[str, dict] = {}
+_running_sync_job: dict | None = None
+_sync_tasks: set[asyncio.Task] = set()
+
+
+def _utcnow() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _new_sync_job(force: bool, languages: list[str]) -> dict:
+    """Create a queued sync job and register it (dropping the oldest finished jobs)."""
+    job = {
+        "job_id": uuid.uuid4().hex,
+        "status": "queued",
+        "force": force,
+        "languages": languages,
+        "created_at": _utcnow(),
+        "started_at": None,
+        "finished_at": None,
+        "duration_ms": None,
+        "phase": None,
+        "phases": {phase: {"status": "pending"} for phase in _SYNC_PHASES},
+        "result": None,
+        "error": None,
+    }
+    _sync_jobs[job["job_id"]] = job
+
+    finished = [j for j in _sync_jobs.values() if j["finished_at"] is not None]
+    for old in finished[: max(0, len(finished) - SYNC_JOB_HISTORY)]:
+        del _sync_jobs[old["job_id"]]
+    return job
+
+
+@contextmanager
+def _sync_phase(job: dict, phase: str):
+    """Track status and duration of one sync phase; yields the phase dict for details."""
+    entry = job["phases"][phase]
+    entry["status"] = "running"
+    job["phase"] = phase
+    started = time.monotonic()
+    try:
+        yield entry
+    except BaseException:
+        entry["status"] = "failed"
+        raise
     else:
-        return {"status": "degraded", "inbox_accessible": False}
+        if entry["status"] == "running":
+            entry["status"] = "done"
+    finally:
+        entry["duration_ms"] = int((time.monotonic() - started) * 1000)
 
 
-@app.post("/intents/sync")
-async def intents_sync():
+def _covers(job: dict, force: bool, languages: list[str]) -> bool:
+    """Whether a running job already does everything a new request asks for."""
+    return set(languages) <= set(job["languages"]) and (job["force"] or not force)
+
+
+def _sync_job_status(job: dict) -> dict:
+    """JSON view of a job (without the internal task handle)."""
+    return {key: value for key, value in job.items() if key != "task"}
+
+
+async def _run_sync_job(job: dict) -> None:
+    """Run a sync job to completion, recording its result or error."""
+    global _running_sync_job
+    job["status"] = "running"
+    job["started_at"] = _utcnow()
+    start_time = time.time()
+    try:
+        job["result"] = await _sync_intents(job)
+        job["status"] = "succeeded"
+    except HTTPException as exc:
+        job["status"] = "failed"
+        job["error"] = {"status_code": exc.status_code, "detail": exc.detail}
+    except asyncio.CancelledError:
+        job["status"] = "cancelled"
+        raise
+    except Exception as exc:
+        logger.exception("Sync job %s failed", job["job_id"])
+        job["status"] = "failed"
+        job["error"] = {"status_code": 500, "detail": str(exc)}
+    finally:
+        job["phase"] = None
+        job["finished_at"] = _utcnow()
+        job["duration_ms"] = int((time.time() - start_time) * 1000)
+        if _running_sync_job is job:
+            _running_sync_job = None
+        logger.info("Sync job %s %s after %d ms", job["job_id"], job["status"], job["duration_ms"])
+
+
+async def _sync_intents(job: dict) -> dict:
     """
     Download HA intents from GitHub, expand Hassil templates,
     and upsert into alice.ha_intent_templates.
-    """
-    start_time = time.time()
 
-    # Step 1: Download and extract
-    try:
-        domain_yamls = _download_and_extract_intents()
-    except (httpx.HTTPError, zipfile.BadZipFile) as exc:
-        logger.error("Failed to download/extract HA intents: %s", exc)
-        raise HTTPException(
-            status_code=503,
-            detail=f"Failed to download HA intents from GitHub: {exc}",
-        )
+    All languages of the job are extracted from a single archive read,
+    expanded concurrently and upserted in one transaction.
 
-    # Step 2: Get shared expansion rules from _common.yaml
-    shared_rules = _merge_common_rules(domain_yamls)
-    logger.info("Loaded %d shared expansion rules from _common", len(shared_rules))
+    Only domains whose YAML entry or _common.yaml rules changed since the last
+    sync are re-expanded; the others are reported in skipped_domains.
+    force=true re-expands every domain.
 
-    # Step 3: Parse and expand each domain
-    all_templates: list[dict] = []
+    Errors are raised as HTTPException and recorded in the job.
+    """
+    import httpx
 
-    for domain, yaml_data in domain_yamls.items():
-        # Skip meta files
-        if domain.startswith("_"):
-            continue
+    force = job["force"]
+    languages = job["languages"]
 
-        # Merge shared rules into domain-specific rules
-        domain_rules = dict(shared_rules)
-        domain_rules.update(yaml_data.get("expansion_rules", {}))
-        yaml_data["expansion_rules"] = domain_rules
+    # Step 1: Download (blocking I/O runs off the event loop)
+    with _sync_phase(job, "download") as phase:
+        try:
+            archive_path, archive_source = await asyncio.to_thread(_fetch_intents_archive)
+        except (httpx.HTTPError, OSError) as exc:
+            logger.error("Failed to download HA intents: %s", exc)
+            raise HTTPException(
+                status_code=503,
+                detail=f"Failed to download HA intents from GitHub: {exc}",
+            )
+        phase["archive"] = archive_source
 
+    # Step 2: Extract and parse the YAML files of the requested languages
+    with _sync_phase(job, "parse") as phase:
         try:
-            templates = parse_intent_yaml(yaml_data, domain, MAX_PATTERNS_PER_INTENT)
-            all_templates.extend(templates)
-        except Exception as exc:
-            logger.error("Failed to parse domain %s: %s", domain, exc)
-            # Continue with other domains
+            by_language = await asyncio.to_thread(_load_intents, archive_path, languages)
+        except (zipfile.BadZipFile, OSError, BrokenProcessPool) as exc:
+            logger.error("Failed to extract HA intents: %s", exc)
+            raise HTTPException(
+                status_code=503,
+                detail=f"Failed to extract HA intents archive: {exc}",
+            )
+        phase["files"] = {lang: len(domain_yamls) for lang, (domain_yamls, _) in by_language.items()}
+
+        unknown = [lang for lang, (domain_yamls, _) in by_language.items() if not domain_yamls]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"No intent sentences found for language(s): {unknown}",
+            )
+
+    # Step 3: Determine which domains changed since the last sync, then
+    # expand them for all languages (in parallel worker processes)
+    with _sync_phase(job, "expand") as phase:
+        stored_hashes: dict[str, dict[str, tuple[str, str]]] = {}
+        if not force:
+            try:
+                stored_hashes = await asyncio.to_thread(_load_source_hashes, languages)
+            except Exception as exc:
+                logger.warning("Could not load source hashes, expanding all domains: %s", exc)
+
+        work: dict[str, tuple[dict[str, dict], dict[str, list[str]], list[str]]] = {}
+        rules_hashes: dict[str, str] = {}
+        skipped_domains: dict[str, list[str]] = {}
+        for language, (domain_yamls, entry_hashes) in by_language.items():
+            # Shared expansion rules from this language's _common.yaml
+            shared_rules = merge_common_rules(domain_yamls)
+            logger.info(
+                "Loaded %d shared expansion rules from _common (%s)", len(shared_rules), language
+            )
+
+            rules_hashes[language] = _rules_hash(entry_hashes)
+            changed = _changed_domains(
+                entry_hashes, stored_hashes.get(language, {}), rules_hashes[language]
+            )
+            skipped_domains[language] = sorted(
+                d for d in domain_yamls if not d.startswith("_") and d not in changed
+            )
+            logger.info(
+                "%s: %d domains changed, %d unchanged (skipped)",
+                language,
+                len(changed),
+                len(skipped_domains[language]),
+            )
+            work[language] = (domain_yamls, shared_rules, changed)
+
+        phase["skipped"] = sum(len(domains) for domains in skipped_domains.values())
+        all_templates, failed_domains, budget_exceeded = await _expand_domains(work, phase)
+        phase["templates"] = len(all_templates)
 
     logger.info("Total templates to upsert: %d", len(all_templates))
 
-    # Step 4: Upsert into PostgreSQL
-    try:
-        counts = _upsert_templates(all_templates)
-    except Exception as exc:
-        logger.error("Database upsert failed: %s", exc)
-        raise HTTPException(
-            status_code=500,
-            detail=f"Database upsert failed: {exc}",
+    # Source hashes are only recorded for domains that expanded completely, so
+    # failed domains and domains cut short by their expansion budget (which
+    # may depend on the wall clock) are retried on the next sync.
+    truncated = {(diag["language"], diag["domain"]) for diag in budget_exceeded}
+    sources: list[tuple[str, str, str, str]] = []
+    for language, (_, entry_hashes) in by_language.items():
+        sources.extend(
+            (language, domain, entry_hashes[domain], rules_hashes[language])
+            for domain in work[language][2]
+            if domain not in failed_domains[language] and (language, domain) not in truncated
         )
+        if "_common" in entry_hashes:
+            sources.append((language, "_common", entry_hashes["_common"], ""))
 
-    # Step 5: Publish MQTT event
-    try:
-        _publish_mqtt(
-            "alice/ha/sync",
-            {"event": "templates_updated", "source": "github"},
-        )
-    except Exception as exc:
-        logger.warning("MQTT publish failed (sync still succeeded): %s", exc)
+    # Step 4: Upsert all languages into PostgreSQL (one transaction)
+    with _sync_phase(job, "upsert") as phase:
+        try:
+            counts = await asyncio.to_thread(_upsert_templates, all_templates, sources)
+        except Exception as exc:
+            logger.error("Database upsert failed: %s", exc)
+            raise HTTPException(
+                status_code=500,
+                detail=f"Database upsert failed: {exc}",
+            )
+        phase.update(counts)
 
-    duration_ms = int((time.time() - start_time) * 1000)
+    # Step 5: Publish MQTT event -- only if templates actually changed, since
+    # every templates_updated triggers a full re-vectorisation in alice-ha-sync.
+    # A publish that failed after an earlier upsert is retried here even if
+    # nothing changed this time (the content hashes no longer show the change).
+    published = False
+    with _sync_phase(job, "publish") as phase:
+        changed = bool(counts["inserted"] or counts["updated"])
+        retry = not changed and _publish_pending()
+        if changed or retry:
+            if retry:
+                logger.info("Retrying templates_updated publish from an earlier sync")
+                phase["retry"] = True
+            try:
+                await asyncio.to_thread(
+                    _publish_mqtt,
+                    "alice/ha/sync",
+                    {"event": "templates_updated", "source": "github"},
+                )
+                published = True
+                _set_publish_pending(False)
+            except Exception as exc:
+                logger.warning("MQTT publish failed (sync still succeeded, will retry): %s", exc)
+                _set_publish_pending(True)
+                phase["error"] = str(exc)
+        else:
+            logger.info("No template changes, not publishing templates_updated")
+            phase["status"] = "skipped"
+        phase["published"] = published
 
     return {
+        "languages": languages,
         "inserted": counts["inserted"],
         "updated": counts["updated"],
+        "unchanged": counts["unchanged"],
         "skipped": counts["skipped"],
-        "duration_ms": duration_ms,
+        "skipped_domains": skipped_domains,
+        "failed_domains": {lang: sorted(domains) for lang, domains in failed_domains.items()},
+        "budget_exceeded": budget_exceeded,
+        "published": published,
+        "archive": archive_source,
     }
 
 
+# ---------------------------------------------------------------------------
+# Endpoints
+# ---------------------------------------------------------------------------
+@app.get("/health")
+async def health():
+    """Health check endpoint (includes the startup and warm-up timings)."""
+    inbox_accessible = DATA_INBOX_PATH.is_dir()
+
+    if inbox_accessible:
+        return {"status": "healthy", "startup": _startup}
+    else:
+        return {"status": "degraded", "inbox_accessible": False, "startup": _startup}
+
+
+@app.post("/intents/sync", status_code=202)
+async def intents_sync(
+    response: Response,
+    force: bool = False,
+    languages: list[str] | None = Query(default=None),
+    wait: bool = False,
+):
+    """
+    Start a background sync of the HA intents (see _sync_intents) and return
+    its job id immediately; poll GET /intents/sync/{job_id} for progress.
+
+    languages selects the sentence languages (default: HA_LANGUAGES).
+    force=true re-expands every domain.
+
+    While a sync is running, requests it already covers (same or fewer
+    languages, no force unless the running job forces) are coalesced into it
+    and get its job id with coalesced=true; other requests get 409.
+
+    wait=true waits for the job to finish and returns its final status: 200
+    with the counts under "result", or the job's error status code if it
+    failed. Callers that need the counts use wait=true or poll the job.
+    """
+    global _running_sync_job
+
+    languages = list(dict.fromkeys(languages or HA_LANGUAGES))
+    invalid = [lang for lang in languages if not _LANGUAGE_RE.match(lang)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid language code(s): {invalid}")
+
+    coalesced = False
+    job = _running_sync_job
+    if job is not None:
+        if not _covers(job, force, languages):
+            raise HTTPException(
+                status_code=409,
+                detail=f"Sync job {job['job_id']} is running for languages {job['languages']} "
+                f"(force={job['force']}); retry when it has finished",
+            )
+        logger.info("Coalescing sync request into running job %s", job["job_id"])
+        coalesced = True
+        task = job["task"]
+    else:
+        job = _new_sync_job(force, languages)
+        _running_sync_job = job
+        task = asyncio.create_task(_run_sync_job(job))
+        job["task"] = task
+        _sync_tasks.add(task)
+        task.add_done_callback(_sync_tasks.discard)
+        logger.info("Started sync job %s (languages=%s, force=%s)", job["job_id"], languages, force)
+
+    if wait:
+        # shield: a client disconnect must not cancel the shared job
+        await asyncio.shield(task)
+        # A failed job answers with its error status, like the synchronous endpoint did
+        response.status_code = 200 if job["status"] == "succeeded" else job["error"]["status_code"]
+
+    return {**_sync_job_status(job), "coalesced": coalesced}
+
+
+@app.get("/intents/sync/{job_id}")
+async def intents_sync_status(job_id: str):
+    """Status of a sync job: overall status, per-phase progress and the result or error."""
+    job = _sync_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown sync job: {job_id}")
+    return _sync_job_status(job)
+
+
 @app.post("/intents/trigger-entity-sync")
 async def trigger_entity_sync():
     """Publish MQTT event to trigger entity sync without running a full import."""
     try:
-        _publish_mqtt(
+        await asyncio.to_thread(
+            _publish_mqtt,
             "alice/ha/sync",
             {"event": "templates_updated", "source": "github"},
         )
+        _set_publish_pending(False)
     except Exception as exc:
         logger.error("MQTT publish failed: %s", exc)
         raise HTTPException(
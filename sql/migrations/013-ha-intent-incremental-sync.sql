@@ -0,0 +1,29 @@
+-- ============================================================
+-- Migration 013: Incremental HA intent sync
+-- ============================================================
+-- Lets hassil-parser skip unchanged upstream intent files:
+--   * ha_intent_templates.content_hash: hash of the expanded
+--     template; unchanged rows are not rewritten on re-sync.
+--   * ha_intent_sources: hash per upstream YAML entry (and of
+--     the _common.yaml rules it was expanded with). Domains
+--     whose hashes match are not re-expanded.
+-- Idempotent: safe to run multiple times.
+-- Run: docker exec postgres psql -U user -d alice -f /path/to/013-ha-intent-incremental-sync.sql
+-- ============================================================
+
+-- 1. Per-template content hash (NULL = never hashed, forces one update)
+ALTER TABLE alice.ha_intent_templates
+    ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+
+-- 2. Per-entry source hashes of the last successful sync
+CREATE TABLE IF NOT EXISTS alice.ha_intent_sources (
+    language        VARCHAR(10)  NOT NULL,            -- e.g. de, en
+    entry           VARCHAR(100) NOT NULL,            -- YAML entry stem, e.g. light, _common
+    content_hash    VARCHAR(64)  NOT NULL,            -- sha256 of the raw YAML entry
+    rules_hash      VARCHAR(64)  NOT NULL DEFAULT '', -- sha256 of _common rules + expansion settings
+    synced_at       TIMESTAMPTZ  NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (language, entry)
+);
+
+-- To force a full re-expansion: TRUNCATE alice.ha_intent_sources;
+-- (or call POST /intents/sync?force=true)
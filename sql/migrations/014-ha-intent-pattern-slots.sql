@@ -0,0 +1,22 @@
+-- ============================================================
+-- Migration 014: Precomputed slot signatures per pattern
+-- ============================================================
+-- hassil-parser stores, next to ha_intent_templates.patterns, one
+-- slot signature per pattern (same order):
+--   {"slots": ["name", "area"],          -- slot names, first occurrence order
+--    "skip": false,                      -- needs a runtime value ({value}, {message}, {temperature})
+--    "offsets": [["name", 8, 14], ...]}  -- [slot, start, end] of every {slot}
+-- alice-ha-sync fills patterns from the offsets instead of scanning them.
+-- NULL = not computed (e.g. seed/manual templates); consumers fall back
+-- to scanning the pattern text.
+-- Deploy order: run this BEFORE the hassil-parser version that writes
+-- pattern_slots (its upsert fails without the column). alice-ha-sync
+-- tolerates the missing column and scans patterns at runtime.
+-- Idempotent: safe to run multiple times.
+-- Run: docker exec postgres psql -U user -d alice -f /path/to/014-ha-intent-pattern-slots.sql
+-- Then: POST /intents/sync (the template format version bump re-expands
+-- and rewrites every hassil-parser template once)
+-- ============================================================
+
+ALTER TABLE alice.ha_intent_templates
+    ADD COLUMN IF NOT EXISTS pattern_slots JSONB;